@@ -1,5 +1,6 @@
 from django.contrib import admin
-from .models import Grid
+from .models import Grid, GenerationJob
 
 # Register your models here.
 admin.site.register(Grid)
+admin.site.register(GenerationJob)
@@ -0,0 +1,73 @@
+import asyncio
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from .solution_cache import cached_solve
+from .utile import option
+
+# Solver offloading for the async views. The solve runs on a small thread pool so the
+# event loop keeps serving other clients; a per-loop semaphore caps how many solves run
+# at once and how many may wait. When the awaiting task is cancelled (Django cancels the
+# view when the client disconnects) the solve's cancel event is set and the search stops
+# at its next node instead of finishing work nobody will read.
+
+_executor = None
+_executor_lock = threading.Lock()
+_limits = weakref.WeakKeyDictionary()
+
+
+class SolverBusy(Exception):
+    pass
+
+
+async_setting = partial(option, 'SUDOKU_ASYNC')
+
+
+def get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=async_setting('WORKERS', 4), thread_name_prefix='solver')
+        return _executor
+
+
+class Limit:
+    def __init__(self):
+        self.running = asyncio.Semaphore(async_setting('WORKERS', 4))
+        self.pending = 0
+
+
+def get_limit():
+    # Semaphores belong to one event loop, so each loop gets its own
+    loop = asyncio.get_running_loop()
+    limit = _limits.get(loop)
+    if limit is None:
+        limit = _limits[loop] = Limit()
+    return limit
+
+
+async def run_solver(fn, *args, **kwargs):
+    """Await fn(*args, cancel=event, **kwargs) on the solver pool.
+
+    Raises SolverBusy when MAX_PENDING solves are already running or waiting.
+    """
+    limit = get_limit()
+    if limit.pending >= async_setting('MAX_PENDING', 64):
+        raise SolverBusy('Solver busy, retry')
+    cancel = threading.Event()
+    limit.pending += 1
+    try:
+        async with limit.running:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(get_executor(), partial(fn, *args, cancel=cancel, **kwargs))
+    except asyncio.CancelledError:
+        cancel.set()
+        raise
+    finally:
+        limit.pending -= 1
+
+
+async def async_cached_solve(grid):
+    return await run_solver(cached_solve, grid)
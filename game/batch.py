@@ -0,0 +1,98 @@
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+
+from .boards import geometry, size_of
+from .canonical import canonical_key
+from .grader import grade
+from .solution_cache import normalize
+from .sudoku import solve, count_solutions, is_valid_input, squares
+from .utile import grid_values, option, setting
+
+GRID_CHARS = frozenset('0123456789.')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+batch_setting = partial(option, 'SUDOKU_BATCH')
+
+
+def get_executor():
+    # The solver is pure Python and holds the GIL, so batches go to worker processes
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=batch_setting('WORKERS', None) or os.cpu_count())
+        return _executor
+
+
+def reset_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is not None:
+            _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
+
+
+def solve_timed(grid, engine=None):
+    # The configured engine only knows 9x9; other sizes are left to sized_engine
+    if size_of(grid) != 9:
+        engine = None
+    start = time.perf_counter()
+    solution = solve(grid, engine)
+    elapsed = time.perf_counter() - start
+    return (''.join(solution[s] for s in geometry(size_of(grid)).squares) if solution else ''), elapsed
+
+
+def check_grid(grid, engine=None):
+    # Admission checks, grading and canonical key for bulk imports:
+    # returns (grid, canonical key, solution, grade, reject reason). grid is the raw field
+    # from the file and must be exactly 81 characters of 0-9 and '.' before it is normalized
+    if len(grid) != 81 or not GRID_CHARS.issuperset(grid):
+        return grid, None, None, None, 'malformed'
+    grid = normalize(grid)
+    if not is_valid_input(grid_values(grid)):
+        return grid, None, None, None, 'duplicate digits'
+    solutions = count_solutions(grid, 2, engine)
+    if not solutions:
+        return grid, None, None, None, 'unsolvable'
+    if solutions > 1:
+        return grid, None, None, None, 'multiple solutions'
+    solution = solve(grid, engine)
+    return grid, canonical_key(grid), ''.join(solution[s] for s in squares), grade(grid), None
+
+
+# Returns (status, solution, seconds) per grid, in input order. Grids still pending when
+# time_budget runs out are cancelled and reported as 'timeout'; one that already started
+# keeps its worker busy until it finishes, but no longer holds up the response.
+def solve_batch(grids, time_budget=None):
+    # Resolve the engine here: spawned workers don't load the project settings
+    engine = setting('SUDOKU_SOLVER_ENGINE', 'classic')
+    try:
+        executor = get_executor()
+        futures = dict((g, executor.submit(solve_timed, g, engine)) for g in set(grids))
+    except BrokenProcessPool:
+        reset_executor()
+        raise
+
+    done, not_done = wait(futures.values(), timeout=time_budget)
+    for future in not_done:
+        future.cancel()
+
+    results = []
+    for grid in grids:
+        future = futures[grid]
+        if future not in done:
+            results.append(('timeout', None, None))
+        elif future.exception() is not None:
+            if isinstance(future.exception(), BrokenProcessPool):
+                reset_executor()
+            results.append(('error', None, None))
+        else:
+            solution, elapsed = future.result()
+            results.append(('solved' if solution else 'unsolvable', solution or None, elapsed))
+    return results
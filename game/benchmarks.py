@@ -0,0 +1,148 @@
+import json
+import platform
+import time
+from pathlib import Path
+
+from . import bitmask, sudoku
+from .boards import SIZES
+from .sudoku import solve, is_valid_input, ENGINES
+from .utile import grid_values
+
+CORPUS_DIR = Path(__file__).resolve().parent / 'puzzles'
+TIERS = ['easy', 'hard', 'minimal17']
+# Corpus per board size for the bitset engine; 9x9 reuses the hard tier
+SIZE_TIERS = {4: 'size4', 9: 'hard', 16: 'size16', 25: 'size25'}
+
+
+def load_corpus(tier):
+    with open(CORPUS_DIR / f'{tier}.txt') as f:
+        return [line.strip() for line in f if line.strip() and not line.startswith('#')]
+
+
+def percentile(ordered, q):
+    if not ordered:
+        return None
+    k = (len(ordered) - 1) * q / 100
+    lo, hi = int(k), min(int(k) + 1, len(ordered) - 1)
+    return ordered[lo] + (ordered[hi] - ordered[lo]) * (k - lo)
+
+
+def summarize(samples):
+    ordered = sorted(samples)
+    total = sum(ordered)
+    return {
+        'calls': len(ordered),
+        'total': round(total, 6),
+        'mean': total / len(ordered),
+        'min': ordered[0],
+        'p50': percentile(ordered, 50),
+        'p90': percentile(ordered, 90),
+        'p99': percentile(ordered, 99),
+        'max': ordered[-1],
+        'ops_per_sec': round(len(ordered) / total, 1) if total else None,
+    }
+
+
+def measure(fn, inputs, repeat=5, warmup=1):
+    # One timing sample per call; warmup rounds fill caches and are discarded
+    for _ in range(warmup):
+        for args in inputs:
+            fn(*args)
+    samples = []
+    clock = time.perf_counter
+    for _ in range(repeat):
+        for args in inputs:
+            start = clock()
+            fn(*args)
+            samples.append(clock() - start)
+    return summarize(samples)
+
+
+def bench_solve(tiers=TIERS, engines=None, repeat=5):
+    results = []
+    for engine in engines or list(ENGINES):
+        for tier in tiers:
+            grids = [(g, engine) for g in load_corpus(tier)]
+            results.append({'name': 'solve', 'engine': engine, 'tier': tier, **measure(solve, grids, repeat)})
+    return results
+
+
+def bench_count(tiers=TIERS, engines=None, repeat=5):
+    # Uniqueness checks (count up to 2), where the search has to finish the whole tree
+    results = []
+    for engine in engines or list(ENGINES):
+        for tier in tiers:
+            grids = [(g, 2, engine) for g in load_corpus(tier)]
+            results.append({'name': 'count_solutions', 'engine': engine, 'tier': tier,
+                            **measure(sudoku.count_solutions, grids, repeat)})
+    return results
+
+
+def bench_sizes(sizes=SIZES, repeat=5):
+    # The bitset engine on every board size, so the numbers compare across sizes
+    results = []
+    for size in sizes:
+        grids = [(g, 'bitset') for g in load_corpus(SIZE_TIERS[size])]
+        results.append({'name': 'solve', 'engine': 'bitset', 'size': size, 'tier': SIZE_TIERS[size],
+                        **measure(solve, grids, repeat)})
+    return results
+
+
+def bench_parse(tiers=TIERS, repeat=5):
+    results = []
+    for name, parse in [('classic', sudoku.parse_grid), ('bitmask', bitmask.parse_grid)]:
+        for tier in tiers:
+            grids = [(g,) for g in load_corpus(tier)]
+            results.append({'name': 'parse_grid', 'engine': name, 'tier': tier, **measure(parse, grids, repeat)})
+    return results
+
+
+def bench_is_valid_input(tiers=TIERS, repeat=20):
+    results = []
+    for tier in tiers:
+        grids = [(grid_values(g),) for g in load_corpus(tier)]
+        results.append({'name': 'is_valid_input', 'tier': tier, **measure(is_valid_input, grids, repeat)})
+    return results
+
+
+def bench_http(tiers=TIERS, repeat=5):
+    # Runs against a throwaway test database so the benchmark never writes real rows
+    from django.db import connection
+    from django.test import Client
+    from django.test.utils import setup_test_environment, teardown_test_environment
+    from .models import Grid
+
+    setup_test_environment()
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        client = Client()
+        results = []
+        for tier in tiers:
+            puzzles = [Grid.objects.create(grid=g) for g in load_corpus(tier)]
+            for grid_obj in puzzles:
+                grid_obj.get_solution()
+
+            def validate(pk, cells):
+                client.post(f'/validate/solution/{pk}/', json.dumps({'user_input': cells}),
+                            content_type='application/json')
+
+            def solve_api(pk, cells):
+                client.post(f'/api/puzzles/{pk}/solve/', {'grid_input': cells}, content_type='application/json')
+
+            inputs = [(p.id, grid_values(p.grid)) for p in puzzles]
+            results.append({'name': 'validate_solution_progress', 'tier': tier, **measure(validate, inputs, repeat)})
+            results.append({'name': 'SudokuSolveAPI', 'tier': tier, **measure(solve_api, inputs, repeat)})
+        return results
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def environment():
+    return {
+        'python': platform.python_version(),
+        'implementation': platform.python_implementation(),
+        'machine': platform.machine(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+    }
@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+# Bitmask solver engine: same contract as sudoku.solve, but candidates are kept
+# as 9-bit integers in a flat list indexed 0..80 instead of strings in a dict.
+# Propagation runs naked and hidden singles, then locked candidates (pointing and
+# claiming) whenever the singles run dry.
+from array import array
+from operator import itemgetter
+
+from .utile import cross, SolveCancelled
+
+rows = 'ABCDEFGHI'
+digits = '123456789'
+cols = digits
+squares = cross(rows, cols)
+
+ALL = (1 << 9) - 1
+BIT = dict((d, 1 << i) for i, d in enumerate(digits))
+DIGIT = dict((1 << i, d) for i, d in enumerate(digits))
+COUNT = [bin(m).count('1') for m in range(ALL + 1)]
+SOLO = [m if COUNT[m] == 1 else 0 for m in range(ALL + 1)]
+BITS = [tuple(1 << i for i in range(9) if m & (1 << i)) for m in range(ALL + 1)]
+
+_index = dict((s, i) for i, s in enumerate(squares))
+_unit_c = [cross(rows, c) for c in cols]
+_unit_r = [cross(r, cols) for r in rows]
+_unit_sq = [cross(r, c) for r in ['ABC', 'DEF', 'GHI'] for c in ['123', '456', '789']]
+
+UNITLIST = [tuple(_index[s] for s in u) for u in _unit_c + _unit_r + _unit_sq]
+UNITS = [tuple(u for u in UNITLIST if i in u) for i in range(81)]
+PEERS = [tuple(sorted(set(sum(UNITS[i], ())) - {i})) for i in range(81)]
+UNIT_GETTERS = [(u, itemgetter(*u)) for u in UNITLIST]
+UNIT_IDS = [tuple(n for n, u in enumerate(UNITLIST) if i in u) for i in range(81)]
+UNIT_BITS = [sum(1 << n for n, u in enumerate(UNITLIST) if i in u) for i in range(81)]
+ALL_UNITS = (1 << len(UNITLIST)) - 1
+
+# Locked candidates work on the board packed into one int, 16 bits per cell in row order
+# (array('H') and int.from_bytes, both in C). A segment is the three cells a box shares
+# with a row or a column. OR-ing shifted copies of the board puts every row segment at
+# lane r * 9 + 3 * bc and every column segment at lane 27 * br + c, and rotating lanes
+# within a line or a box gives each segment the union of the other two, for all 54
+# segments in a few big-int operations.
+W = 16
+LANE = (1 << W) - 1
+
+
+def _lanes(cells):
+    return sum(ALL << (W * i) for i in cells)
+
+
+def _rotations(step, groups):
+    # groups[k]: the lanes of the k-th of three segments, step lanes apart
+    m0, m1, m2 = (_lanes(g) for g in groups)
+    m01, m12 = m0 | m1, m1 | m2
+    s1, s2 = step * W, 2 * step * W
+
+    def others(x):
+        return ((x >> s1) & m01) | ((x << s2) & m2) | ((x >> s2) & m0) | ((x << s1) & m12)
+    return others
+
+
+ROW_LANES = [r * 9 + 3 * bc for r in range(9) for bc in range(3)]
+COL_LANES = [27 * br + c for br in range(3) for c in range(9)]
+ROW_SEGMENTS = _lanes(ROW_LANES)
+COL_SEGMENTS = _lanes(COL_LANES)
+row_line = _rotations(3, [[r * 9 + 3 * bc for r in range(9)] for bc in range(3)])
+row_box = _rotations(9, [[r * 9 + 3 * bc for r in range(9) if r % 3 == k for bc in range(3)] for k in range(3)])
+col_line = _rotations(27, [[27 * k + c for c in range(9)] for k in range(3)])
+col_box = _rotations(1, [[27 * br + c for br in range(3) for c in range(9) if c % 3 == k] for k in range(3)])
+
+
+def _row_segment(r, bc):
+    return [r * 9 + 3 * bc + k for k in range(3)]
+
+
+def _col_segment(c, br):
+    return [(3 * br + k) * 9 + c for k in range(3)]
+
+
+# Per segment lane, the cells of the rest of its line and of the rest of its box
+ROW_REST_LINE, ROW_REST_BOX, COL_REST_LINE, COL_REST_BOX = ([None] * 81 for _ in range(4))
+for _r in range(9):
+    for _bc in range(3):
+        _lane = _r * 9 + 3 * _bc
+        ROW_REST_LINE[_lane] = tuple(i for b in range(3) if b != _bc for i in _row_segment(_r, b))
+        ROW_REST_BOX[_lane] = tuple(i for r in range(_r - _r % 3, _r - _r % 3 + 3) if r != _r
+                                    for i in _row_segment(r, _bc))
+for _c in range(9):
+    for _br in range(3):
+        _lane = 27 * _br + _c
+        COL_REST_LINE[_lane] = tuple(i for b in range(3) if b != _br for i in _col_segment(_c, b))
+        COL_REST_BOX[_lane] = tuple(i for c in range(_c - _c % 3, _c - _c % 3 + 3) if c != _c
+                                    for i in _col_segment(c, _br))
+
+
+def parse_grid(grid):
+    cells = [0] * 81
+    used = [0] * len(UNITLIST)
+    i = 0
+    for c in grid:
+        if i == 81:
+            break
+        if c in BIT:
+            bit = BIT[c]
+            for u in UNIT_IDS[i]:
+                if used[u] & bit:
+                    return False
+                used[u] |= bit
+            cells[i] = bit
+            i += 1
+        elif c in '0.':
+            i += 1
+
+    queue = []
+    for i in range(81):
+        if not cells[i]:
+            a, b, c = UNIT_IDS[i]
+            m = ALL & ~(used[a] | used[b] | used[c])
+            if not m:
+                return False
+            cells[i] = m
+            if COUNT[m] == 1:
+                queue.append(i)
+    if not propagate(cells, queue):
+        return False
+    return cells
+
+
+def propagate(cells, queue, dirty=ALL_UNITS):
+    peers, count, solo, unit_bits, getters = PEERS, COUNT, SOLO, UNIT_BITS, UNIT_GETTERS
+    while True:
+        while queue:
+            i = queue.pop()
+            m = cells[i]
+            dirty |= unit_bits[i]
+            for p in peers[i]:
+                pm = cells[p]
+                if pm & m:
+                    pm ^= m
+                    if not pm:
+                        return False
+                    cells[p] = pm
+                    if count[pm] == 1:
+                        queue.append(p)
+
+        while dirty:
+            low = dirty & -dirty
+            dirty ^= low
+            unit, getter = getters[low.bit_length() - 1]
+            a, b, c, d, e, f, g, h, k = getter(cells)
+            twice = a & b
+            once = a | b
+            twice |= once & c
+            once |= c
+            twice |= once & d
+            once |= d
+            twice |= once & e
+            once |= e
+            twice |= once & f
+            once |= f
+            twice |= once & g
+            once |= g
+            twice |= once & h
+            once |= h
+            twice |= once & k
+            once |= k
+            if once != ALL:
+                return False
+            single = once & ~twice & ~(
+                solo[a] | solo[b] | solo[c] | solo[d] | solo[e] | solo[f] | solo[g] | solo[h] | solo[k])
+            if single:
+                for i in unit:
+                    m = cells[i] & single
+                    if m:
+                        if count[m] > 1:
+                            return False
+                        cells[i] = m
+                        dirty |= unit_bits[i]
+                        queue.append(i)
+        if not queue:
+            dirty = locked(cells, queue)
+            if dirty <= 0:
+                return dirty == 0
+
+
+def locked(cells, queue):
+    """Pointing and claiming over every box-line segment.
+
+    Digits a box keeps to one segment leave the rest of that line, and digits a line keeps
+    to one segment leave the rest of that box. Returns the units of the changed cells
+    (0 when nothing changed) or -1 on a contradiction; new singles go on queue.
+    """
+    board = int.from_bytes(array('H', cells), 'little')
+    rows = (board | board >> W | board >> 2 * W) & ROW_SEGMENTS
+    cols = (board | board >> 9 * W | board >> 18 * W) & COL_SEGMENTS
+    dirty = 0
+    for seg, line_of, box_of, rest_line, rest_box in (
+            (rows, row_line, row_box, ROW_REST_LINE, ROW_REST_BOX),
+            (cols, col_line, col_box, COL_REST_LINE, COL_REST_BOX)):
+        line = line_of(seg)
+        box = box_of(seg)
+        pointing = seg & line & ~box
+        if pointing:
+            dirty = eliminate(cells, queue, pointing, rest_line, dirty)
+            if dirty < 0:
+                return -1
+        claiming = seg & box & ~line
+        if claiming:
+            dirty = eliminate(cells, queue, claiming, rest_box, dirty)
+            if dirty < 0:
+                return -1
+    return dirty
+
+
+def eliminate(cells, queue, found, rest, dirty):
+    # found: per segment lane, the digits to clear from the cells in rest[lane]
+    while found:
+        lane = ((found & -found).bit_length() - 1) // W
+        digits = (found >> (lane * W)) & LANE
+        found &= ~(LANE << (lane * W))
+        for i in rest[lane]:
+            m = cells[i]
+            if m & digits:
+                m &= ~digits
+                if not m:
+                    return -1
+                cells[i] = m
+                dirty |= UNIT_BITS[i]
+                if COUNT[m] == 1:
+                    queue.append(i)
+    return dirty
+
+
+def search(cells, stats=None, depth=0, cancel=None):
+    if not cells:
+        return False
+    if cancel is not None and cancel.is_set():
+        raise SolveCancelled
+    counts = list(map(COUNT.__getitem__, cells))
+    for n in range(2, 10):
+        if n in counts:
+            break
+    else:
+        return cells
+    best = counts.index(n)
+    for bit in BITS[cells[best]]:
+        trial = cells[:]
+        trial[best] = bit
+        ok = propagate(trial, [best], UNIT_BITS[best])
+        if stats is not None:
+            stats.node(depth + 1, *progress(cells, trial), failed=not ok)
+        if ok:
+            result = search(trial, stats, depth + 1, cancel)
+            if result:
+                return result
+    return False
+
+
+def progress(before, after):
+    # (eliminated candidates, newly fixed cells) between two search states
+    before = list(map(COUNT.__getitem__, before))
+    after = list(map(COUNT.__getitem__, after))
+    return sum(before) - sum(after), after.count(1) - before.count(1)
+
+
+def count(cells, limit):
+    if not cells:
+        return 0
+    counts = list(map(COUNT.__getitem__, cells))
+    for n in range(2, 10):
+        if n in counts:
+            break
+    else:
+        return 1
+    best = counts.index(n)
+    total = 0
+    for bit in BITS[cells[best]]:
+        trial = cells[:]
+        trial[best] = bit
+        if propagate(trial, [best], UNIT_BITS[best]):
+            total += count(trial, limit - total)
+            if total >= limit:
+                break
+    return total
+
+
+def to_values(cells):
+    return dict(zip(squares, [DIGIT.get(m) or ''.join(DIGIT[b] for b in BITS[m]) for m in cells]))
+
+
+def solve(grid, stats=None, cancel=None):
+    cells = parse_grid(grid)
+    if stats is not None and cells:
+        stats.node(0, *progress([ALL] * 81, cells))
+    cells = search(cells, stats, cancel=cancel)
+    return to_values(cells) if cells else False
+
+
+def count_solutions(grid, limit=2):
+    return count(parse_grid(grid), limit)
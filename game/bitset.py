@@ -0,0 +1,198 @@
+# -*- coding: utf-8 -*-
+# Bitset solver engine for any board size in boards.SIZES. Candidates are N-bit integers,
+# one per cell; propagation does naked singles (a fixed cell clears its peers) and hidden
+# singles (a digit with one place left in a unit), and search is the trail/undo loop of
+# trail.py with the fewest-candidates heuristic. Same contract as the other engines, with
+# the size taken from the grid length.
+from .boards import geometry, size_of
+from .utile import SolveCancelled
+
+
+def parse_grid(grid, geo=None):
+    geo = geo or geometry(size_of(grid))
+    if len(grid) != geo.cells:
+        return False
+    used = [0] * len(geo.unitlist)
+    cells = [0] * geo.cells
+    for i, c in enumerate(grid):
+        bit = geo.bit.get(c)
+        if bit is None:
+            continue
+        for u in geo.unit_ids[i]:
+            if used[u] & bit:
+                return False
+            used[u] |= bit
+        cells[i] = bit
+
+    queue = []
+    for i in range(geo.cells):
+        if not cells[i]:
+            m = geo.all
+            for u in geo.unit_ids[i]:
+                m &= ~used[u]
+            if not m:
+                return False
+            cells[i] = m
+            if not m & (m - 1):
+                queue.append(i)
+    if not propagate(cells, [], queue, geo):
+        return False
+    return cells
+
+
+def propagate(cells, trail, queue, geo, dirty=None):
+    peers, unit_bits, unitlist, full = geo.peers, geo.unit_bits, geo.unitlist, geo.all
+    push = trail.append
+    if dirty is None:
+        dirty = geo.all_units
+    while True:
+        while queue:
+            i = queue.pop()
+            m = cells[i]
+            dirty |= unit_bits[i]
+            for p in peers[i]:
+                pm = cells[p]
+                if pm & m:
+                    push(p)
+                    push(pm)
+                    pm ^= m
+                    cells[p] = pm
+                    if not pm:
+                        return False
+                    if not pm & (pm - 1):
+                        queue.append(p)
+
+        while dirty:
+            low = dirty & -dirty
+            dirty ^= low
+            unit = unitlist[low.bit_length() - 1]
+            once = twice = fixed = 0
+            for i in unit:
+                m = cells[i]
+                twice |= once & m
+                once |= m
+                if not m & (m - 1):
+                    fixed |= m
+            if once != full:
+                return False
+            single = once & ~twice & ~fixed
+            if single:
+                for i in unit:
+                    m = cells[i] & single
+                    if m:
+                        if m & (m - 1):
+                            return False
+                        push(i)
+                        push(cells[i])
+                        cells[i] = m
+                        dirty |= unit_bits[i]
+                        queue.append(i)
+        if not queue:
+            return True
+
+
+def undo(cells, trail, mark):
+    while len(trail) > mark:
+        old = trail.pop()
+        cells[trail.pop()] = old
+
+
+def pick(cells):
+    # First open cell with the fewest candidates, -1 when the board is full
+    counts = list(map(int.bit_count, cells))
+    best, fewest = -1, len(counts)
+    for i, n in enumerate(counts):
+        if 1 < n < fewest:
+            best, fewest = i, n
+            if n == 2:
+                break
+    return best
+
+
+def changes(cells, trail, mark):
+    # (eliminated candidates, newly fixed cells) since mark
+    first = {}
+    for k in range(mark, len(trail), 2):
+        first.setdefault(trail[k], trail[k + 1])
+    eliminated = sum(old.bit_count() - cells[i].bit_count() for i, old in first.items())
+    fixed = sum(1 for i, old in first.items() if old.bit_count() > 1 and cells[i].bit_count() == 1)
+    return eliminated, fixed
+
+
+def search(cells, geo, limit=1, stats=None, cancel=None):
+    # Yields each solution (a copy of the cells) until limit solutions have been found
+    trail = []
+    queue = []
+    branch_cells = []
+    branch_rest = []
+    branch_marks = []
+    found = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise SolveCancelled
+        best = pick(cells)
+        if best < 0:
+            yield cells[:]
+            found += 1
+            if found >= limit:
+                return
+        else:
+            branch_cells.append(best)
+            branch_rest.append(cells[best])
+            branch_marks.append(len(trail))
+
+        while branch_cells:
+            i = branch_cells[-1]
+            rest = branch_rest[-1]
+            mark = branch_marks[-1]
+            undo(cells, trail, mark)
+            if not rest:
+                branch_cells.pop()
+                branch_rest.pop()
+                branch_marks.pop()
+                continue
+            bit = rest & -rest
+            branch_rest[-1] = rest ^ bit
+            trail.append(i)
+            trail.append(cells[i])
+            cells[i] = bit
+            queue.clear()
+            queue.append(i)
+            ok = propagate(cells, trail, queue, geo, geo.unit_bits[i])
+            if stats is not None:
+                stats.node(len(branch_cells), *changes(cells, trail, mark), failed=not ok)
+            if ok:
+                break
+        else:
+            return
+
+
+def to_values(cells, geo):
+    return dict(zip(geo.squares, [''.join(geo.digit[1 << b] for b in range(geo.size) if m >> b & 1)
+                                  for m in cells]))
+
+
+def solve(grid, stats=None, cancel=None):
+    size = size_of(grid)
+    if size is None:
+        return False
+    geo = geometry(size)
+    cells = parse_grid(grid, geo)
+    if not cells:
+        return False
+    if stats is not None:
+        stats.node(0, sum(size - m.bit_count() for m in cells), sum(1 for m in cells if m.bit_count() == 1))
+    for solution in search(cells, geo, 1, stats, cancel):
+        return to_values(solution, geo)
+    return False
+
+
+def count_solutions(grid, limit=2):
+    size = size_of(grid)
+    if size is None:
+        return 0
+    geo = geometry(size)
+    cells = parse_grid(grid, geo)
+    if not cells:
+        return 0
+    return sum(1 for _ in search(cells, geo, limit))
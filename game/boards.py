@@ -0,0 +1,77 @@
+# -*- coding: utf-8 -*-
+# Geometry of an N x N board made of n x n boxes (N = n * n): 4x4, 9x9, 16x16 and 25x25.
+# Cells are given as 1-9 then A-P, '.' or '0' for empty; squares are named like the 9x9
+# ones, row letter then column number ('A1' ... 'Y25'). Tables are built the first time a
+# size is asked for and kept for the life of the process.
+from functools import lru_cache
+from math import isqrt
+
+SIZES = (4, 9, 16, 25)
+SYMBOLS = '123456789ABCDEFGHIJKLMNOP'
+ROW_NAMES = 'ABCDEFGHIJKLMNOPQRSTUVWXY'
+EMPTY = '0.'
+
+
+class Geometry:
+    def __init__(self, size):
+        box = isqrt(size)
+        self.size = size
+        self.box = box
+        self.cells = size * size
+        self.symbols = SYMBOLS[:size]
+        self.squares = [r + str(c) for r in ROW_NAMES[:size] for c in range(1, size + 1)]
+
+        # Same unit order as the 9x9 tables: columns, rows, boxes
+        columns = [tuple(r * size + c for r in range(size)) for c in range(size)]
+        rows = [tuple(r * size + c for c in range(size)) for r in range(size)]
+        boxes = [tuple((br + r) * size + bc + c for r in range(box) for c in range(box))
+                 for br in range(0, size, box) for bc in range(0, size, box)]
+        self.unitlist = columns + rows + boxes
+        self.unit_ids = [tuple(n for n, u in enumerate(self.unitlist) if i in u) for i in range(self.cells)]
+        self.unit_bits = [sum(1 << n for n in ids) for ids in self.unit_ids]
+        self.peers = [tuple(sorted(set(p for n in ids for p in self.unitlist[n]) - {i}))
+                      for i, ids in enumerate(self.unit_ids)]
+        self.all_units = (1 << len(self.unitlist)) - 1
+
+        self.all = (1 << size) - 1
+        self.bit = dict((d, 1 << i) for i, d in enumerate(self.symbols))
+        self.digit = dict((1 << i, d) for i, d in enumerate(self.symbols))
+
+    def __repr__(self):
+        return f'Geometry({self.size})'
+
+    def values(self, grid):
+        # grid_values for this size: square name -> symbol or '.'
+        return dict(zip(self.squares, (c if c in self.bit else '.' for c in grid)))
+
+
+@lru_cache(maxsize=None)
+def geometry(size):
+    if size not in SIZES:
+        raise ValueError(f'Unsupported board size: {size}')
+    return Geometry(size)
+
+
+def size_of(grid):
+    # Board size from a grid string of exactly N * N cells, None for any other length
+    for size in SIZES:
+        if len(grid) == size * size:
+            return size
+    return None
+
+
+def is_valid_grid(grid, size):
+    # Right length, known symbols and no digit twice in a unit
+    geo = geometry(size)
+    if len(grid) != geo.cells:
+        return False
+    for unit in geo.unitlist:
+        seen = set()
+        for i in unit:
+            c = grid[i]
+            if c in EMPTY:
+                continue
+            if c not in geo.bit or c in seen:
+                return False
+            seen.add(c)
+    return True
@@ -0,0 +1,150 @@
+# -*- coding: utf-8 -*-
+# Canonical form of a puzzle under the symmetries that keep a sudoku valid: transposition,
+# band and stack swaps, row swaps inside a band, column swaps inside a stack and digit
+# relabelling (2 * 6^8 layouts times 9! labellings). The key is the smallest layout in
+# lexicographic order, empty cells ('.') first and digits renamed 1, 2, 3... in order of
+# first appearance. Instead of walking the group, the key is built one row at a time,
+# keeping only the partial layouts that tie for the smallest prefix. A column order is
+# only fixed by the first row with givens, so leading empty rows don't multiply the search.
+from collections import namedtuple
+from itertools import permutations, product
+
+STACK_ORDERS = list(permutations(range(3)))
+
+Form = namedtuple('Form', ['key', 'cells', 'digits'])
+
+
+class CanonicalForm(Form):
+    """key: the canonical 81-char grid.
+
+    cells[i] is the index in the original grid of canonical cell i, digits maps each
+    canonical digit to the original one (a full bijection, also for digits not given).
+    """
+    __slots__ = ()
+
+    def to_canonical(self, grid):
+        # Any grid in the original layout (the puzzle itself, its solution) to the canonical one
+        digits = dict((d, c) for c, d in self.digits.items())
+        return ''.join(digits.get(grid[i], '.') for i in self.cells)
+
+    def from_canonical(self, grid):
+        values = ['.'] * 81
+        for i, c in zip(self.cells, grid):
+            values[i] = self.digits.get(c, '.')
+        return ''.join(values)
+
+
+def next_rows(rows):
+    # A new band can start from any row of an unused band; otherwise stay in the current band
+    if len(rows) % 3 == 0:
+        used = set(r // 3 for r in rows)
+        return [r for b in range(3) if b not in used for r in range(3 * b, 3 * b + 3)]
+    band = rows[-1] // 3
+    return [r for r in range(3 * band, 3 * band + 3) if r not in rows]
+
+
+def smallest_column_orders(row):
+    # Column orders putting a row's givens as far right as possible, before any digit is
+    # labelled: stacks by ascending given count, empty columns first inside each stack
+    counts = [sum(1 for c in range(3 * s, 3 * s + 3) if row[c]) for s in range(3)]
+    stack_orders = [o for o in STACK_ORDERS if counts[o[0]] <= counts[o[1]] <= counts[o[2]]]
+    inside = []
+    for s in range(3):
+        empty = [c for c in range(3 * s, 3 * s + 3) if not row[c]]
+        given = [c for c in range(3 * s, 3 * s + 3) if row[c]]
+        inside.append([e + g for e in permutations(empty) for g in permutations(given)])
+    for order in stack_orders:
+        for parts in product(*(inside[s] for s in order)):
+            yield parts[0] + parts[1] + parts[2]
+
+
+def label_row(row, cols, labels, last, bound=None):
+    # The row under a column order, digits renamed; returns (labelled, labels, last label),
+    # or None as soon as it is sure to come out above bound
+    out = []
+    copied = False
+    for c in cols:
+        v = row[c]
+        if v:
+            label = labels.get(v)
+            if label is None:
+                if not copied:
+                    labels = dict(labels)
+                    copied = True
+                last += 1
+                label = labels[v] = last
+        else:
+            label = 0
+        if bound is not None:
+            b = bound[len(out)]
+            if label > b:
+                return None
+            if label < b:
+                bound = None
+        out.append(label)
+    return tuple(out), labels, last
+
+
+def canonical_form(grid):
+    values = [ord(c) - 48 if '1' <= c <= '9' else 0 for c in grid[:81]]
+    layouts = [
+        [values[9 * r:9 * r + 9] for r in range(9)],
+        [values[c::9] for c in range(9)],
+    ]
+
+    # (transposed, source rows so far, column order or None, labels, last label)
+    candidates = [(t, (), None, {}, 0) for t in (0, 1)]
+    key = []
+    empty = (0,) * 9
+    for k in range(9):
+        best = None
+        kept = []
+        for t, rows, cols, labels, last in candidates:
+            for r in next_rows(rows):
+                row = layouts[t][r]
+                if cols is None:
+                    if not any(row):
+                        options = [(empty, None, labels, last)]
+                    else:
+                        # Every smallest order gives the same labelled row; expand them only
+                        # if that row is still in the running
+                        orders = smallest_column_orders(row)
+                        first = next(orders)
+                        labelled = label_row(row, first, labels, last, best)
+                        if labelled is None:
+                            continue
+                        options = [(labelled[0], first, labelled[1], labelled[2])]
+                        for order in orders:
+                            out, new_labels, new_last = label_row(row, order, labels, last)
+                            options.append((out, order, new_labels, new_last))
+                else:
+                    labelled = label_row(row, cols, labels, last, best)
+                    if labelled is None:
+                        continue
+                    options = [(labelled[0], cols, labelled[1], labelled[2])]
+                for out, order, new_labels, new_last in options:
+                    if best is None or out < best:
+                        best = out
+                        kept = []
+                    if out == best:
+                        kept.append((t, rows + (r,), order, new_labels, new_last))
+        key.append(best)
+        candidates = kept
+
+    t, rows, cols, labels, last = candidates[0]
+    cols = cols or tuple(range(9))
+    if t:
+        cells = [9 * c + r for r in rows for c in cols]
+    else:
+        cells = [9 * r + c for r in rows for c in cols]
+    # Digits the puzzle never gives still need a label for mapping solutions
+    for d in range(1, 10):
+        if d not in labels:
+            last += 1
+            labels[d] = last
+    digits = dict((str(label), str(d)) for d, label in labels.items())
+    return CanonicalForm(''.join(str(v) if v else '.' for row in key for v in row), cells, digits)
+
+
+def canonical_key(grid):
+    return canonical_form(grid).key
@@ -0,0 +1,136 @@
+# -*- coding: utf-8 -*-
+# Compiled check plans. Checking a board against a stored puzzle only needs the givens and
+# the solution, so both are compiled once per puzzle into a CheckPlan: the solution as a
+# string indexed by cell, the givens as one flag byte per cell (indexing bytes is cheaper
+# than shifting an 81-bit int) and the sorted given squares the progress response returns.
+# Square names map to cell numbers through one table per board size. A check then walks the
+# submitted cells only, a lookup and a comparison each, without the database or a solve.
+#
+# Plans sit in a bounded in-process LRU (lru.LRUCache) in front of the Django cache, keyed
+# by grid id; models drops both copies when the grid is saved or deleted. Other workers'
+# in-process copies of an edited grid live until SUDOKU_CHECK_PLANS['TTL'].
+import threading
+from collections import namedtuple
+from functools import lru_cache
+
+from django.core.cache import cache
+
+from .boards import geometry
+from .lru import LRUCache
+from .utile import option
+
+CheckPlan = namedtuple('CheckPlan', ['size', 'grid', 'solution', 'givens', 'initial_cells'])
+
+
+@lru_cache(maxsize=None)
+def cell_index(size):
+    return dict((s, i) for i, s in enumerate(geometry(size).squares))
+
+
+def compile_plan(grid, solution, size=9):
+    # solution is '' for an unsolvable grid
+    geo = geometry(size)
+    givens = bytes(c in geo.bit for c in grid)
+    initial_cells = tuple(sorted(s for s, given in zip(geo.squares, givens) if given))
+    return CheckPlan(size, grid, solution, givens, initial_cells)
+
+
+def check(plan, cells, skip_givens=False, empty=''):
+    """Mark the submitted cells against the solution: (filled, wrong, correct, unknown).
+
+    cells maps square names to entries, strings of at most one character (callers check
+    JSON input with views.valid_entries); blank entries and those in empty are skipped.
+    wrong and correct are cell numbers, givens left out of both with skip_givens; filled
+    counts every entry on the board, givens included. unknown lists the names that are
+    not squares of this board.
+    """
+    index = cell_index(plan.size)
+    solution, givens = plan.solution, plan.givens
+    filled = 0
+    wrong = []
+    correct = []
+    unknown = []
+    for s, v in cells.items():
+        if not v or (empty and v in empty):
+            continue
+        i = index.get(s)
+        if i is None:
+            unknown.append(s)
+            continue
+        filled += 1
+        if skip_givens and givens[i]:
+            continue
+        if v == solution[i]:
+            correct.append(i)
+        else:
+            wrong.append(i)
+    return filled, wrong, correct, unknown
+
+
+def square_names(plan, cells):
+    # Cell numbers back to square names, in board order
+    squares = geometry(plan.size).squares
+    return [squares[i] for i in sorted(cells)]
+
+
+def solution_values(plan):
+    return dict(zip(geometry(plan.size).squares, plan.solution)) if plan.solution else False
+
+
+class PlanCache:
+    def __init__(self, max_entries=1024, ttl=None):
+        self.local = LRUCache(max_entries, ttl)
+        self.ttl = ttl
+
+    def get(self, pk):
+        plan = self.local.get(pk)
+        if plan is None:
+            plan = cache.get(plan_key(pk))
+            if plan is not None:
+                self.local.set(pk, plan)
+        return plan
+
+    def set(self, pk, plan):
+        self.local.set(pk, plan)
+        cache.set(plan_key(pk), plan, self.ttl or None)
+        return plan
+
+    # For async views: the Django cache is reached through its async API, not on the loop
+    async def aget(self, pk):
+        plan = self.local.get(pk)
+        if plan is None:
+            plan = await cache.aget(plan_key(pk))
+            if plan is not None:
+                self.local.set(pk, plan)
+        return plan
+
+    async def aset(self, pk, plan):
+        self.local.set(pk, plan)
+        await cache.aset(plan_key(pk), plan, self.ttl or None)
+        return plan
+
+    def forget(self, pk):
+        self.local.discard(pk)
+        cache.delete(plan_key(pk))
+
+
+def plan_key(pk):
+    return f'sudoku:check-plan:{pk}'
+
+
+_plans = None
+_plans_lock = threading.Lock()
+
+
+def get_plan_cache():
+    global _plans
+    if _plans is None:
+        with _plans_lock:
+            if _plans is None:
+                _plans = PlanCache(max_entries=option('SUDOKU_CHECK_PLANS', 'MAX_ENTRIES', 1024),
+                                   ttl=option('SUDOKU_CHECK_PLANS', 'TTL'))
+    return _plans
+
+
+def forget_plan(pk):
+    get_plan_cache().forget(pk)
@@ -0,0 +1,220 @@
+# -*- coding: utf-8 -*-
+# Dancing Links (Knuth's Algorithm X) engine. A puzzle is an exact cover problem: one row
+# per (cell, digit) covering four columns - the cell, and the digit in its column, row and
+# box (units in the order of sudoku.unitlist). The links live in flat int lists instead of
+# node objects: node 0 is the root, nodes 1..columns are the column headers and each row
+# adds four nodes. The links for a size are built once; a solve works on copies of them.
+from functools import lru_cache
+
+from .boards import geometry, size_of
+from .utile import SolveCancelled
+
+
+class Links:
+    def __init__(self, size):
+        geo = geometry(size)
+        self.geo = geo
+        cells = geo.cells
+        columns = cells + len(geo.unitlist) * size
+        rows = cells * size
+        nodes = 1 + columns + 4 * rows
+        L = list(range(-1, nodes - 1))
+        R = list(range(1, nodes + 1))
+        U = list(range(nodes))
+        D = list(range(nodes))
+        C = list(range(nodes))
+        S = [0] * (columns + 1)
+        ROW = [-1] * nodes
+
+        # Header ring: root and columns
+        L[0], R[columns] = columns, 0
+
+        first = [0] * rows
+        node = columns + 1
+        for i in range(cells):
+            for d in range(size):
+                row = i * size + d
+                first[row] = node
+                cols = [1 + i] + [1 + cells + u * size + d for u in geo.unit_ids[i]]
+                for k, col in enumerate(cols):
+                    n = node + k
+                    L[n] = node + (k - 1) % 4
+                    R[n] = node + (k + 1) % 4
+                    # Append at the bottom of the column
+                    U[n] = U[col]
+                    D[n] = col
+                    D[U[col]] = n
+                    U[col] = n
+                    C[n] = col
+                    ROW[n] = row
+                    S[col] += 1
+                node += 4
+
+        self.links = (L, R, U, D, C, S)
+        self.row_of = ROW
+        self.first = first
+
+
+@lru_cache(maxsize=None)
+def links(size):
+    return Links(size)
+
+
+def cover(c, L, R, U, D, C, S):
+    L[R[c]] = L[c]
+    R[L[c]] = R[c]
+    i = D[c]
+    while i != c:
+        j = R[i]
+        while j != i:
+            U[D[j]] = U[j]
+            D[U[j]] = D[j]
+            S[C[j]] -= 1
+            j = R[j]
+        i = D[i]
+
+
+def uncover(c, L, R, U, D, C, S):
+    i = U[c]
+    while i != c:
+        j = L[i]
+        while j != i:
+            S[C[j]] += 1
+            U[D[j]] = j
+            D[U[j]] = j
+            j = L[j]
+        i = U[i]
+    L[R[c]] = c
+    R[L[c]] = c
+
+
+def select(r, L, R, U, D, C, S):
+    # Take row r: cover the columns of its other nodes, leaving r's own column to the caller
+    j = R[r]
+    while j != r:
+        cover(C[j], L, R, U, D, C, S)
+        j = R[j]
+
+
+def unselect(r, L, R, U, D, C, S):
+    j = L[r]
+    while j != r:
+        uncover(C[j], L, R, U, D, C, S)
+        j = L[j]
+
+
+def smallest_column(R, S):
+    c = R[0]
+    best, fewest = c, S[c]
+    while c and fewest > 1:
+        c = R[c]
+        if c and S[c] < fewest:
+            best, fewest = c, S[c]
+    return best
+
+
+def prepare(grid, size):
+    # Fresh links with the givens taken, or None when two givens clash
+    base = links(size)
+    state = tuple(list(a) for a in base.links)
+    L, R, U, D, C, S = state
+    covered = bytearray(len(S))
+    for i, ch in enumerate(grid):
+        bit = base.geo.bit.get(ch)
+        if bit is None:
+            continue
+        r = base.first[i * size + bit.bit_length() - 1]
+        n = r
+        while True:
+            if covered[C[n]]:
+                return None
+            covered[C[n]] = 1
+            cover(C[n], *state)
+            n = R[n]
+            if n == r:
+                break
+    return state
+
+
+def search(state, base, given, limit=None, stats=None, cancel=None):
+    """Yield each solution as an N * N char string, until limit solutions have been found.
+
+    Iterative Algorithm X: chosen holds the row node taken at each depth; its column is
+    the one covered on the way down and uncovered after the last row of it was tried.
+    """
+    L, R, U, D, C, S = state
+    row_of, symbols, size = base.row_of, base.geo.symbols, base.geo.size
+    chosen = []
+    found = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise SolveCancelled
+        if R[0] == 0:
+            cells = list(given)
+            for n in chosen:
+                row = row_of[n]
+                cells[row // size] = symbols[row % size]
+            yield ''.join(cells)
+            found += 1
+            if limit is not None and found >= limit:
+                return
+            r = -1
+        else:
+            # Open the smallest column; an empty one is a dead end and climbs straight back
+            c = smallest_column(R, S)
+            cover(c, *state)
+            r = D[c]
+
+        while r == -1 or r == C[r]:
+            # Column exhausted (or a solution just reported): drop the row of the level above
+            if r != -1:
+                uncover(r, *state)
+            if not chosen:
+                return
+            r = chosen.pop()
+            unselect(r, *state)
+            r = D[r]
+
+        if stats is not None:
+            # Rows (candidates) the choice rules out: those left in the columns it covers
+            removed = 0
+            j = R[r]
+            while j != r:
+                removed += S[C[j]]
+                j = R[j]
+        select(r, *state)
+        chosen.append(r)
+        if stats is not None:
+            stats.node(len(chosen), removed, 1, failed=R[0] != 0 and S[smallest_column(R, S)] == 0)
+
+
+def start(grid, stats=None):
+    size = size_of(grid)
+    if size is None:
+        return None, None, None
+    state = prepare(grid, size)
+    given = [c if c in geometry(size).bit else '.' for c in grid]
+    if stats is not None and state is not None:
+        stats.node(0, 0, sum(1 for c in given if c != '.'))
+    return state, links(size), given
+
+
+def solutions(grid, limit=None, cancel=None):
+    # Every solution of grid as a string, lazily
+    state, base, given = start(grid)
+    if state is None:
+        return
+    yield from search(state, base, given, limit, cancel=cancel)
+
+
+def solve(grid, stats=None, cancel=None):
+    state, base, given = start(grid, stats)
+    if state is None:
+        return False
+    for solution in search(state, base, given, 1, stats, cancel):
+        return base.geo.values(solution)
+    return False
+
+
+def count_solutions(grid, limit=2):
+    return sum(1 for _ in solutions(grid, limit))
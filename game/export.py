@@ -0,0 +1,73 @@
+# -*- coding: utf-8 -*-
+# Corpus export shared by the export_grids command and the /api/puzzles/export/ endpoint.
+# Rows come from values_list(...).iterator(chunk_size), a server-side cursor on Postgres and
+# chunked fetches on SQLite, so memory stays flat whatever the size of the table. Lines are
+# joined into blocks before they are written or streamed, one write per block of rows.
+import csv
+import json
+
+from .models import Grid
+
+FORMATS = ('ndjson', 'csv')
+COLUMNS = ('id', 'size', 'grid', 'difficulty', 'grade', 'technique', 'source', 'date', 'owner')
+FIELDS = {'owner': 'created_by__username'}
+CONTENT_TYPES = {'ndjson': 'application/x-ndjson', 'csv': 'text/csv'}
+
+
+def export_queryset(difficulty=None, source=None, date_from=None, date_to=None, owner=None, queryset=None):
+    grids = Grid.objects.all() if queryset is None else queryset
+    if difficulty:
+        grids = grids.filter(difficulty=difficulty)
+    if source:
+        grids = grids.filter(source=source)
+    if date_from:
+        grids = grids.filter(date__gte=date_from)
+    if date_to:
+        grids = grids.filter(date__lte=date_to)
+    if owner:
+        grids = grids.filter(created_by__username=owner)
+    return grids
+
+
+def columns_for(solution=False):
+    return COLUMNS + ('solution',) if solution else COLUMNS
+
+
+def export_rows(grids, columns, chunk_size=2000):
+    fields = [FIELDS.get(c, c) for c in columns]
+    return grids.order_by('id').values_list(*fields).iterator(chunk_size=chunk_size)
+
+
+class Echo:
+    # csv.writer target that hands each formatted line back instead of storing it
+    def write(self, value):
+        return value
+
+
+def ndjson_lines(columns, rows):
+    dumps = json.JSONEncoder(separators=(',', ':'), default=str).encode
+    for row in rows:
+        yield dumps(dict(zip(columns, row))) + '\n'
+
+
+def csv_lines(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def export_lines(fmt, columns, rows):
+    return ndjson_lines(columns, rows) if fmt == 'ndjson' else csv_lines(columns, rows)
+
+
+def blocks(lines, size=1000):
+    # size lines per string, so a stream doesn't pay a write per row
+    block = []
+    for line in lines:
+        block.append(line)
+        if len(block) >= size:
+            yield ''.join(block)
+            block = []
+    if block:
+        yield ''.join(block)
@@ -0,0 +1,80 @@
+from django.core.exceptions import ValidationError
+from django.db import models
+from django import forms
+
+from .boards import SIZES, SYMBOLS, size_of
+
+# Grids are stored packed 4 bits per cell: 81 cells in 41 bytes, first cell in the high
+# nibble, 0 for an empty cell. Packing is a hex round trip, so both directions run in C:
+# '.' becomes '0', the 81 hex digits (padded to 82) go through bytes.fromhex, and back.
+# 4x4 grids pack the same way into 8 bytes. 16x16 and 25x25 grids have more symbols than
+# a nibble holds and take one byte per cell (0 empty, 1-25 for 1-9A-P), so every size has
+# its own packed length and the size can be told from the bytes alone.
+# vectorized.load_packed decodes whole batches of 9x9 rows from these bytes in NumPy.
+SIZE_CHARS = dict((size, frozenset('.0' + SYMBOLS[:size])) for size in SIZES)
+NIBBLE_SIZES = dict(((size * size + 1) // 2, size) for size in (4, 9))
+BYTE_SIZES = dict((size * size, size) for size in (16, 25))
+
+_to_hex = str.maketrans('.', '0')
+_from_hex = str.maketrans('0', '.')
+_to_bytes = str.maketrans(dict([('.', 0), ('0', 0)] + [(c, i + 1) for i, c in enumerate(SYMBOLS)]))
+_from_bytes = str.maketrans(dict([(0, '.')] + [(i + 1, c) for i, c in enumerate(SYMBOLS)]))
+
+
+def pack(grid):
+    # grid: N * N chars with '.' or '0' for empty; '' (no solution) packs to b''
+    if not grid:
+        return b''
+    size = size_of(grid)
+    if size is None:
+        raise ValueError('A grid has 16, 81, 256 or 625 cells')
+    if size > 9:
+        return grid.translate(_to_bytes).encode('latin-1')
+    return bytes.fromhex(grid.translate(_to_hex) + '0' * (len(grid) % 2))
+
+
+def unpack(data):
+    if not data:
+        return ''
+    if len(data) in NIBBLE_SIZES:
+        size = NIBBLE_SIZES[len(data)]
+        return bytes(data).hex()[:size * size].translate(_from_hex)
+    if len(data) in BYTE_SIZES:
+        return bytes(data).decode('latin-1').translate(_from_bytes)
+    raise ValueError(f'No grid packs to {len(data)} bytes')
+
+
+class PackedGridField(models.Field):
+    """An N * N char grid string in Python (81 chars for 9x9), packed bytes in the database.
+
+    Empty cells come back as '.', whether they were saved as '.' or '0'.
+    """
+    description = 'Sudoku grid packed 4 bits per cell, or one byte per cell from 16x16 up'
+
+    def get_internal_type(self):
+        return 'BinaryField'
+
+    def from_db_value(self, value, expression, connection):
+        if value is None:
+            return value
+        return unpack(value)
+
+    def to_python(self, value):
+        if value is None:
+            return value
+        if isinstance(value, (bytes, memoryview)):
+            return unpack(value)
+        if value and not SIZE_CHARS.get(size_of(value), frozenset()).issuperset(value):
+            raise ValidationError('Grids must be N * N characters of 1-9 (then A-P), 0 or .', code='invalid')
+        return value.replace('0', '.')
+
+    def get_prep_value(self, value):
+        if value is None or isinstance(value, bytes):
+            return value
+        return pack(self.to_python(value))
+
+    def value_to_string(self, obj):
+        return self.value_from_object(obj)
+
+    def formfield(self, **kwargs):
+        return super().formfield(**{'form_class': forms.CharField, 'max_length': 625, **kwargs})
@@ -1,5 +1,7 @@
 from django import forms
 
+from .boards import geometry
+
 
 class LevelForm(forms.Form) :
     LEVEL_CHOICES = [
@@ -13,30 +15,32 @@ class LevelForm(forms.Form) :
     )
 
 
-class SudokuForm(forms.Form) :
-    difficulty = forms.ChoiceField(
-        choices=[('easy', 'Easy'), ('medium', 'Medium'), ('hard', 'Hard')],
-        widget=forms.Select(attrs={'class' :'form-control mb-3'})
-    )
+def cell_pattern(size) :
+    # [1-4], [1-9], [1-9A-G], [1-9A-P]
+    symbols = geometry(size).symbols
+    return f'[1-{symbols[min(size, 9) - 1]}' + (f'A-{symbols[-1]}]' if size > 9 else ']')
 
-    def __init__(self, *args, **kwargs) :
+
+class SudokuForm(forms.Form) :
+    def __init__(self, *args, size=9, **kwargs) :
         super(SudokuForm, self).__init__(*args, **kwargs)
-        rows = 'ABCDEFGHI'
-        cols = '123456789'
-
-        for r in rows :
-            for c in cols :
-                field_name = f'{r}{c}'
-                self.fields[field_name] = forms.CharField(
-                    widget=forms.TextInput(attrs={
-                        'class' :'cell',
-                        'maxlength' :'1',
-                        'inputmode' :'numeric',
-                        'pattern' :'[1-9]',
-                        'autocomplete' :'off',
-                    }),
-                    required=False
-                )
+        self.size = size
+        # Posted back with the cells, so a grid of another size fails validation
+        self.fields['size'] = forms.TypedChoiceField(choices=[(size, f'{size}x{size}')], coerce=int, initial=size,
+                                                     required=False, widget=forms.HiddenInput)
+        pattern = cell_pattern(size)
+
+        for field_name in geometry(size).squares :
+            self.fields[field_name] = forms.CharField(
+                widget=forms.TextInput(attrs={
+                    'class' :'cell',
+                    'maxlength' :'1',
+                    'inputmode' :'numeric' if size <= 9 else 'text',
+                    'pattern' :pattern,
+                    'autocomplete' :'off',
+                }),
+                required=False
+            )
 
         if self.initial :
             for field_name, value in self.initial.items() :
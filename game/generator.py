@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+# Puzzle generator: a random full grid from a randomized bitmask search, then clues are
+# removed in random order as long as the puzzle keeps a single solution. The minimal puzzle
+# is graded; if it is harder than wanted, removed clues go back one at a time until the
+# grade comes down to the target. Pure functions, so the worker can run them in processes.
+import random
+from collections import namedtuple
+
+from .bitmask import BITS, COUNT, DIGIT, UNIT_BITS, count, parse_grid, propagate
+from .canonical import canonical_key
+from .grader import grade, DIFFICULTIES
+
+Generated = namedtuple('Generated', ['grid', 'solution', 'grade', 'canonical_key', 'tries'])
+
+LEVELS = [difficulty for _, difficulty in DIFFICULTIES]
+
+
+def random_solution(rng):
+    # Depth-first like bitmask.search, but branches are tried in random order
+    stack = [parse_grid('.' * 81)]
+    while stack:
+        cells = stack.pop()
+        open_cells = [i for i in range(81) if COUNT[cells[i]] > 1]
+        if not open_cells:
+            return ''.join(DIGIT[m] for m in cells)
+        fewest = min(COUNT[cells[i]] for i in open_cells)
+        best = rng.choice([i for i in open_cells if COUNT[cells[i]] == fewest])
+        bits = list(BITS[cells[best]])
+        rng.shuffle(bits)
+        for bit in reversed(bits):
+            trial = cells[:]
+            trial[best] = bit
+            if propagate(trial, [best], UNIT_BITS[best]):
+                stack.append(trial)
+    return None
+
+
+def is_unique(grid):
+    return count(parse_grid(grid), 2) == 1
+
+
+def remove_clues(solution, rng):
+    # Returns (minimal puzzle, cells removed in order)
+    cells = list(solution)
+    order = list(range(81))
+    rng.shuffle(order)
+    removed = []
+    for i in order:
+        digit = cells[i]
+        cells[i] = '.'
+        if is_unique(''.join(cells)):
+            removed.append(i)
+        else:
+            cells[i] = digit
+    return ''.join(cells), removed
+
+
+def generate(difficulty, seed=None, max_tries=50):
+    """One unique puzzle graded as difficulty, or None after max_tries full grids."""
+    rng = random.Random(seed)
+    target = LEVELS.index(difficulty)
+    for tries in range(1, max_tries + 1):
+        solution = random_solution(rng)
+        puzzle, removed = remove_clues(solution, rng)
+        result = grade(puzzle)
+        if LEVELS.index(result.difficulty) < target:
+            continue
+        # Too hard: put removed clues back in random order until it grades down
+        cells = list(puzzle)
+        rng.shuffle(removed)
+        while LEVELS.index(result.difficulty) > target and removed:
+            i = removed.pop()
+            cells[i] = solution[i]
+            result = grade(''.join(cells))
+        if result.difficulty == difficulty:
+            puzzle = ''.join(cells)
+            return Generated(puzzle, solution, result, canonical_key(puzzle), tries)
+    return None
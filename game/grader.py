@@ -0,0 +1,250 @@
+# -*- coding: utf-8 -*-
+# Difficulty grader: solves like a person would, trying logical techniques from the easiest
+# up, and scores the puzzle by the hardest technique it needed. Candidates are kept
+# incrementally as bitmasks (see bitmask.py) so each step only touches what changed.
+from collections import Counter, namedtuple
+from itertools import combinations
+
+from .bitmask import ALL, BIT, BITS, COUNT, DIGIT, PEERS, UNITLIST, UNIT_IDS
+from .sudoku import solve, squares
+
+COLUMNS, ROWS, BOXES = UNITLIST[:9], UNITLIST[9:18], UNITLIST[18:]
+
+Grade = namedtuple('Grade', ['score', 'technique', 'difficulty', 'steps'])
+
+
+class Board:
+    def __init__(self, grid):
+        self.values = [0] * 81
+        self.cands = [ALL] * 81
+        self.singles = []
+        self.solved = 0
+        self.valid = True
+        i = 0
+        for c in grid:
+            if i == 81:
+                break
+            if c in BIT:
+                if self.cands[i] & BIT[c]:
+                    self.place(i, BIT[c])
+                else:
+                    self.valid = False
+                i += 1
+            elif c in '0.':
+                i += 1
+
+    def copy(self):
+        board = Board.__new__(Board)
+        board.values = self.values[:]
+        board.cands = self.cands[:]
+        board.singles = self.singles[:]
+        board.solved = self.solved
+        board.valid = self.valid
+        return board
+
+    def place(self, i, bit):
+        self.values[i] = bit
+        self.cands[i] = 0
+        self.solved += 1
+        for p in PEERS[i]:
+            m = self.cands[p]
+            if m & bit:
+                m ^= bit
+                self.cands[p] = m
+                if COUNT[m] == 1:
+                    self.singles.append(p)
+                elif not m:
+                    self.valid = False
+
+    def eliminate(self, cells, mask):
+        changed = False
+        for i in cells:
+            m = self.cands[i]
+            if m & mask:
+                m &= ~mask
+                self.cands[i] = m
+                changed = True
+                if COUNT[m] == 1:
+                    self.singles.append(i)
+                elif not m:
+                    self.valid = False
+        return changed
+
+    def places(self, unit, bit):
+        return [i for i in unit if self.cands[i] & bit]
+
+    def grid(self):
+        return ''.join(DIGIT[v] if v else '.' for v in self.values)
+
+
+def naked_single(board):
+    while board.singles:
+        i = board.singles.pop()
+        m = board.cands[i]
+        if not board.values[i] and COUNT[m] == 1:
+            board.place(i, m)
+            return i, DIGIT[m]
+    return None
+
+
+def hidden_single(board):
+    cands = board.cands
+    for unit in UNITLIST:
+        once = twice = 0
+        for i in unit:
+            twice |= once & cands[i]
+            once |= cands[i]
+        single = once & ~twice
+        if single:
+            bit = single & -single
+            for i in unit:
+                if cands[i] & bit:
+                    board.place(i, bit)
+                    return i, DIGIT[bit]
+    return None
+
+
+def naked_subset(board, size):
+    cands = board.cands
+    for unit in UNITLIST:
+        cells = [i for i in unit if 1 < COUNT[cands[i]] <= size]
+        for subset in combinations(cells, size):
+            mask = 0
+            for i in subset:
+                mask |= cands[i]
+            if COUNT[mask] == size:
+                others = [i for i in unit if i not in subset]
+                if board.eliminate(others, mask):
+                    return subset
+    return None
+
+
+def naked_pair(board):
+    return naked_subset(board, 2)
+
+
+def naked_triple(board):
+    return naked_subset(board, 3)
+
+
+def hidden_pair(board):
+    for unit in UNITLIST:
+        positions = {}
+        for bit in BITS[ALL]:
+            cells = board.places(unit, bit)
+            if len(cells) == 2:
+                positions.setdefault(tuple(cells), []).append(bit)
+        for cells, bits in positions.items():
+            if len(bits) == 2 and board.eliminate(cells, ALL & ~(bits[0] | bits[1])):
+                return cells
+    return None
+
+
+def pointing(board):
+    # A digit confined to one row (or column) of a box is removed from the rest of that line
+    for box in BOXES:
+        for bit in BITS[ALL]:
+            cells = board.places(box, bit)
+            if len(cells) < 2:
+                continue
+            for kind in (0, 1):
+                lines = set(UNIT_IDS[i][kind] for i in cells)
+                if len(lines) == 1:
+                    others = [i for i in UNITLIST[lines.pop()] if i not in box]
+                    if board.eliminate(others, bit):
+                        return cells
+    return None
+
+
+def box_line_reduction(board):
+    # A digit confined to one box within a row (or column) is removed from the rest of that box
+    for line in ROWS + COLUMNS:
+        for bit in BITS[ALL]:
+            cells = board.places(line, bit)
+            if len(cells) < 2:
+                continue
+            boxes = set(UNIT_IDS[i][2] for i in cells)
+            if len(boxes) == 1:
+                others = [i for i in UNITLIST[boxes.pop()] if i not in line]
+                if board.eliminate(others, bit):
+                    return cells
+    return None
+
+
+def x_wing(board):
+    for bit in BITS[ALL]:
+        for lines, kind in ((ROWS, 0), (COLUMNS, 1)):
+            pairs = {}
+            for line in lines:
+                cells = board.places(line, bit)
+                if len(cells) == 2:
+                    cross_lines = tuple(UNIT_IDS[i][kind] for i in cells)
+                    pairs.setdefault(cross_lines, []).append(cells)
+            for cross_lines, found in pairs.items():
+                if len(found) == 2:
+                    corners = found[0] + found[1]
+                    others = [i for u in cross_lines for i in UNITLIST[u] if i not in corners]
+                    if board.eliminate(others, bit):
+                        return corners
+    return None
+
+
+# (name, score, step) in the order a person would try them
+TECHNIQUES = [
+    ('naked single', 1, naked_single),
+    ('hidden single', 2, hidden_single),
+    ('naked pair', 3, naked_pair),
+    ('pointing', 4, pointing),
+    ('box/line reduction', 4, box_line_reduction),
+    ('hidden pair', 5, hidden_pair),
+    ('naked triple', 6, naked_triple),
+    ('x-wing', 7, x_wing),
+]
+GUESS = ('guess', 10)
+
+# Highest score that still counts as each difficulty
+DIFFICULTIES = [(2, 'easy'), (5, 'medium'), (GUESS[1], 'hard')]
+
+
+def difficulty_for(score):
+    for limit, difficulty in DIFFICULTIES:
+        if score <= limit:
+            return difficulty
+    return DIFFICULTIES[-1][1]
+
+
+def next_step(board):
+    for name, score, technique in TECHNIQUES:
+        found = technique(board)
+        if found is not None:
+            return name, score, found
+    return None
+
+
+def grade(grid):
+    # Returns a Grade, or None when the grid is contradictory or unsolvable
+    board = Board(grid)
+    if not board.valid:
+        return None
+    steps = Counter()
+    hardest = ('given', 0)
+    solution = None
+    while board.solved < 81:
+        step = next_step(board)
+        if step is None:
+            # Out of techniques: take the solver's value for the most constrained cell
+            if solution is None:
+                solution = solve(grid)
+                if not solution:
+                    return None
+            i = min((COUNT[m], i) for i, m in enumerate(board.cands) if m)[1]
+            board.place(i, BIT[solution[squares[i]]])
+            name, score = GUESS
+        else:
+            name, score = step[0], step[1]
+        if not board.valid:
+            return None
+        steps[name] += 1
+        if score > hardest[1]:
+            hardest = (name, score)
+    return Grade(hardest[1], hardest[0], difficulty_for(hardest[1]), dict(steps))
@@ -0,0 +1,67 @@
+# -*- coding: utf-8 -*-
+# Hints: the next cell a person could fill in and the technique that shows it. The grader
+# Board for a puzzle's givens is built once and cached; a hint copies it, places the
+# player's entries (each one only updates its peers) and runs the grader's techniques
+# until one of them fills a cell. The stored solution is only read to spot wrong entries
+# and for the rare board that needs a guess; nothing is solved per request.
+from collections import namedtuple
+from functools import lru_cache
+
+from .bitmask import BIT, COUNT
+from .check_plan import check, square_names
+from .grader import Board, GUESS, TECHNIQUES, next_step
+from .sudoku import squares
+
+Hint = namedtuple('Hint', ['cell', 'value', 'technique', 'score', 'steps'])
+
+# Techniques that fill a cell; the others only remove candidates
+PLACING = ('naked single', 'hidden single')
+SCORES = dict([(name, score) for name, score, _ in TECHNIQUES] + [GUESS])
+
+_index = dict((s, i) for i, s in enumerate(squares))
+
+
+@lru_cache(maxsize=1024)
+def givens_board(grid):
+    return Board(grid)
+
+
+def wrong_entries(plan, user_input):
+    # Squares the player filled with something other than the solution (givens are ignored);
+    # plan is the puzzle's check_plan.CheckPlan
+    _, wrong, _, _ = check(plan, user_input, skip_givens=True, empty='0.')
+    return square_names(plan, wrong)
+
+
+def next_hint(grid, solution, user_input):
+    """The next logical step from the player's board, as a Hint, or None when it is full.
+
+    user_input maps squares to the player's digits; call wrong_entries first, entries that
+    contradict the solution are not expected here. steps lists the techniques used, in
+    order, to reach the cell (eliminations first, the placing technique last); technique
+    is the hardest of them.
+    """
+    board = givens_board(grid).copy()
+    for s, v in user_input.items():
+        i = _index.get(s)
+        if i is not None and v in BIT and not board.values[i]:
+            board.place(i, BIT[v])
+    if board.solved == 81:
+        return None
+
+    steps = []
+    while True:
+        step = next_step(board)
+        if step is None:
+            break
+        name, score, found = step
+        steps.append(name)
+        if name in PLACING:
+            i, digit = found
+            hardest = max(steps, key=SCORES.get)
+            return Hint(squares[i], digit, hardest, SCORES[hardest], steps)
+
+    # Out of techniques: the most constrained open cell, from the stored solution
+    i = min((COUNT[m], i) for i, m in enumerate(board.cands) if m)[1]
+    steps.append(GUESS[0])
+    return Hint(squares[i], solution[i], GUESS[0], GUESS[1], steps)
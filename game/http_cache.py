@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+# Conditional GETs for the read-only puzzle resources, /api/puzzles/<pk>/ and its /solution/.
+# Each payload is built once and cached with a strong ETag over its JSON, keyed on the grid's
+# updated_at. Every save bumps it and so do the bulk updates of grade_grids and
+# backfill_solutions, so a repeat request costs one indexed lookup of that column - then a
+# 304 or the cached body, without loading the grid or running the solver - and a change made
+# by any process is seen by all of them, whatever the cache backend. Entries of older
+# versions are never read again and expire after SUDOKU_RESOURCE_CACHE_TTL.
+import hashlib
+import json
+from collections import namedtuple
+
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date
+
+from .models import Grid
+from .utile import setting
+
+Resource = namedtuple('Resource', 'data etag last_modified public version')
+
+
+def resource_key(pk, kind, version):
+    return f'sudoku:resource:{kind}:{pk}:{version}'
+
+
+def version_of(updated_at):
+    return int(updated_at.timestamp() * 1000000)
+
+
+def make_etag(data):
+    body = json.dumps(data, sort_keys=True, separators=(',', ':'), default=str)
+    return '"%s"' % hashlib.sha256(body.encode()).hexdigest()[:32]
+
+
+def make_resource(data, grid_obj):
+    # grid_obj needs updated_at and is_public loaded
+    updated_at = grid_obj.updated_at
+    return Resource(dict(data), make_etag(data), int(updated_at.timestamp()), grid_obj.is_public,
+                    version_of(updated_at))
+
+
+def cached_resource(pk, kind, build):
+    # build(pk) loads the grid and returns make_resource(...); it may raise Http404
+    updated_at = Grid.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        raise Http404
+    resource = cache.get(resource_key(pk, kind, version_of(updated_at)))
+    if resource is None:
+        resource = build(pk)
+        # Filed under the version it was built from (a first solve bumps updated_at)
+        cache.set(resource_key(pk, kind, resource.version), resource, setting('SUDOKU_RESOURCE_CACHE_TTL', 86400))
+    return resource
+
+
+def conditional_response(request, resource, respond):
+    # 304 / 412 from the request's If-None-Match / If-Modified-Since, else respond(data)
+    response = get_conditional_response(request, etag=resource.etag, last_modified=resource.last_modified)
+    if response is None:
+        response = respond(resource.data)
+    response['ETag'] = resource.etag
+    response['Last-Modified'] = http_date(resource.last_modified)
+    # Unlisted puzzles stay out of shared caches
+    visibility = {'public': True} if resource.public else {'private': True}
+    patch_cache_control(response, max_age=setting('SUDOKU_HTTP_MAX_AGE', 3600), **visibility)
+    # The same URL answers JSON or the browsable API's HTML depending on Accept
+    patch_vary_headers(response, ['Accept'])
+    return response
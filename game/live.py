@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+# Delta protocol for the live checking on new.html and solve.html. The board travels with
+# the client as a compact signed token (django.core.signing), so the server keeps no
+# session state: each keystroke sends only the changed cells plus the board version, the
+# server re-derives what it needs from the token and answers for the affected cells only.
+from django.core import signing
+
+from .boards import geometry, size_of
+from .check_plan import cell_index
+
+EMPTY = '.'
+
+
+class StaleBoard(Exception):
+    # The token is missing, forged or older than the client's version: resend the whole board
+    pass
+
+
+def dump(state, salt):
+    return signing.dumps(state, salt=salt, compress=True)
+
+
+def load(token, version, salt):
+    try:
+        state = signing.loads(token, salt=salt)
+    except signing.BadSignature:
+        raise StaleBoard('Invalid board token')
+    if state.get('v') != version:
+        raise StaleBoard('Board version mismatch')
+    return state
+
+
+def read_board(cells, base, geo):
+    # cells: {'A1': '5', 'B2': '', ...} over base; unknown keys and values raise ValueError
+    index = cell_index(geo.size)
+    board = list(base)
+    changed = []
+    for key, value in cells.items():
+        i = index.get(key)
+        if i is None:
+            raise ValueError(f'Unknown cell {key}')
+        value = value or EMPTY
+        if value != EMPTY and value not in geo.bit:
+            raise ValueError(f'Invalid value for {key}')
+        if board[i] != value:
+            board[i] = value
+            changed.append(i)
+    return board, changed
+
+
+def unit_counts(board, geo):
+    # counts[u * stride + d]: how often the d-th symbol (from 1) occurs in unit u
+    stride = geo.size + 1
+    counts = [0] * (len(geo.unitlist) * stride)
+    for i, c in enumerate(board):
+        if c != EMPTY:
+            d = geo.bit[c].bit_length()
+            for u in geo.unit_ids[i]:
+                counts[u * stride + d] += 1
+    return counts
+
+
+def in_conflict(board, counts, i, geo):
+    c = board[i]
+    if c == EMPTY:
+        return False
+    stride = geo.size + 1
+    d = geo.bit[c].bit_length()
+    for u in geo.unit_ids[i]:
+        if counts[u * stride + d] > 1:
+            return True
+    return False
+
+
+def affected(old, board, changed, geo):
+    # Changed cells plus the peers holding a digit that left or arrived; nobody else's
+    # conflict state can move
+    cells = set(changed)
+    for i in changed:
+        digits = (old[i], board[i])
+        for p in geo.peers[i]:
+            if board[p] != EMPTY and board[p] in digits:
+                cells.add(p)
+    return cells
+
+
+def grid_delta(state, cells, size=9):
+    """Apply cell changes to a new-puzzle board; state is None for a full resync.
+
+    Returns (state, conflicts) with conflicts {key: bool} for the affected cells.
+    """
+    geo = geometry(size)
+    if state is None:
+        old = [EMPTY] * geo.cells
+        board, changed = read_board(cells, old, geo)
+        state = {'v': 0, 'c': 0}
+    else:
+        old = list(state['b'])
+        board, changed = read_board(cells, old, geo)
+
+    counts = unit_counts(old, geo)
+    touched = affected(old, board, changed, geo)
+    before = sum(1 for i in touched if in_conflict(old, counts, i, geo))
+    stride = size + 1
+    for i in changed:
+        for c, step in ((old[i], -1), (board[i], 1)):
+            if c != EMPTY:
+                d = geo.bit[c].bit_length()
+                for u in geo.unit_ids[i]:
+                    counts[u * stride + d] += step
+
+    conflicts = dict((geo.squares[i], in_conflict(board, counts, i, geo)) for i in touched)
+    state = {
+        'b': ''.join(board),
+        'v': state['v'] + 1,
+        'c': state['c'] - before + sum(conflicts.values()),
+    }
+    return state, conflicts
+
+
+def progress_delta(state, cells, grid, solution):
+    """Apply cell changes to a solving board; givens can't change and are ignored.
+
+    grid and solution are strings of any board size, empty cells '.' in grid. Returns
+    (state, marks) with marks {key: 'wrong' | 'correct' | 'empty'} for the changed cells.
+    """
+    geo = geometry(size_of(grid))
+    index = cell_index(geo.size)
+    squares = geo.squares
+    cells = dict((k, v) for k, v in cells.items() if k not in index or grid[index[k]] == EMPTY)
+    if state is None:
+        board, changed = read_board(cells, grid, geo)
+        old = grid
+        state = {'v': 0, 'w': 0}
+    else:
+        old = state['b']
+        board, changed = read_board(cells, old, geo)
+
+    wrong = state['w']
+    marks = {}
+    for i in changed:
+        if old[i] != EMPTY and old[i] != solution[i]:
+            wrong -= 1
+        if board[i] == EMPTY:
+            marks[squares[i]] = 'empty'
+        elif board[i] != solution[i]:
+            wrong += 1
+            marks[squares[i]] = 'wrong'
+        else:
+            marks[squares[i]] = 'correct'
+
+    state = {'b': ''.join(board), 'v': state['v'] + 1, 'w': wrong}
+    return state, marks
@@ -0,0 +1,43 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+from django.db.models import Q
+from game.models import Grid
+from game.sudoku import solve, SOLVER_VERSION
+
+
+class Command(BaseCommand) :
+    help = 'Solve and store the solution of grids that do not have one yet'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--stale', action='store_true',
+                            help=f'Also re-solve grids stored by a solver version other than {SOLVER_VERSION}')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options) :
+        batch_size = options['batch_size']
+        missing = Q(solved_at__isnull=True)
+        if options['stale'] :
+            missing |= ~Q(solver_version=SOLVER_VERSION)
+        grids = Grid.objects.filter(missing).only('id', 'size', 'grid')
+
+        self.stdout.write(self.style.WARNING(f'Found {grids.count()} grids to solve'))
+
+        batch = []
+        unsolvable = 0
+        for grid in grids.iterator(chunk_size=batch_size) :
+            grid.set_solution(solve(grid.grid))
+            # bulk_update skips auto_now; the API caches key on updated_at
+            grid.updated_at = timezone.now()
+            if not grid.solution :
+                unsolvable += 1
+                self.stdout.write(f"Grid {grid.id}: unsolvable")
+            batch.append(grid)
+            if len(batch) >= batch_size :
+                Grid.objects.bulk_update(batch, ['solution', 'solved_at', 'solver_version', 'updated_at'])
+                batch = []
+        if batch :
+            Grid.objects.bulk_update(batch, ['solution', 'solved_at', 'solver_version', 'updated_at'])
+
+        if unsolvable :
+            self.stdout.write(self.style.WARNING(f'{unsolvable} grids have no solution'))
+        self.stdout.write(self.style.SUCCESS('Done!'))
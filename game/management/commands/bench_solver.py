@@ -0,0 +1,44 @@
+import json
+
+from django.core.management import BaseCommand, CommandError
+from game import benchmarks
+from game.boards import SIZES
+from game.sudoku import ENGINES
+
+
+class Command(BaseCommand) :
+    help = 'Benchmark the solver and the live-checking endpoints, printing JSON with percentiles'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--engine', action='append', choices=list(ENGINES),
+                            help='Engine to benchmark (repeatable, default: all)')
+        parser.add_argument('--tier', action='append', choices=benchmarks.TIERS,
+                            help='Corpus tier (repeatable, default: all)')
+        parser.add_argument('--size', action='append', type=int, choices=SIZES,
+                            help='Board size for the per-size bitset runs (repeatable, default: all)')
+        parser.add_argument('--repeat', type=int, default=5, help='Timed rounds over each corpus')
+        parser.add_argument('--http', action='store_true',
+                            help='Also time test-client round trips (uses a throwaway test database)')
+        parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+
+    def handle(self, *args, **options) :
+        tiers = options['tier'] or benchmarks.TIERS
+        repeat = options['repeat']
+        if repeat < 1 :
+            raise CommandError('--repeat must be at least 1')
+
+        results = benchmarks.bench_solve(tiers, options['engine'], repeat)
+        results += benchmarks.bench_count(tiers, options['engine'], repeat)
+        results += benchmarks.bench_sizes(options['size'] or SIZES, repeat)
+        results += benchmarks.bench_parse(tiers, repeat)
+        results += benchmarks.bench_is_valid_input(tiers, repeat * 4)
+        if options['http'] :
+            results += benchmarks.bench_http(tiers, repeat)
+
+        report = json.dumps({'environment': benchmarks.environment(), 'results': results}, indent=2)
+        if options['output'] :
+            with open(options['output'], 'w') as f :
+                f.write(report + '\n')
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} results to {options['output']}"))
+        else :
+            self.stdout.write(report)
@@ -0,0 +1,33 @@
+from django.core.management import BaseCommand
+from game.models import Grid
+
+
+class Command(BaseCommand) :
+    help = 'Fill in the symmetry-aware canonical key of stored grids'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--all', action='store_true', help='Recompute keys that are already set')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options) :
+        batch_size = options['batch_size']
+        grids = Grid.objects.filter(size=9).only('id', 'size', 'grid')
+        if not options['all'] :
+            grids = grids.filter(canonical_key='')
+
+        self.stdout.write(self.style.WARNING(f'Found {grids.count()} grids to canonicalize'))
+
+        batch = []
+        for grid in grids.iterator(chunk_size=batch_size) :
+            grid.set_canonical()
+            batch.append(grid)
+            if len(batch) >= batch_size :
+                Grid.objects.bulk_update(batch, ['canonical_key'])
+                batch = []
+        if batch :
+            Grid.objects.bulk_update(batch, ['canonical_key'])
+
+        total = Grid.objects.exclude(canonical_key='').count()
+        distinct = Grid.objects.exclude(canonical_key='').values('canonical_key').distinct().count()
+        self.stdout.write(f'  {total} grids, {distinct} distinct up to symmetry')
+        self.stdout.write(self.style.SUCCESS('Done!'))
@@ -5,11 +5,11 @@ class Command(BaseCommand) :
     help = 'Display grids with dots for manual inspection'
 
     def handle(self, *args, **options) :
-        grids = Grid.objects.all()
+        grids = Grid.objects.only('id', 'grid')
 
         self.stdout.write(self.style.WARNING(f'Found {grids.count()} grids in database'))
 
-        for grid in grids :
+        for grid in grids.iterator(chunk_size=2000) :
             dot_count = grid.grid.count('.')
             if dot_count > 0 :
                 self.stdout.write(f"Grid {grid.id}: {dot_count} empty cells (dots)")
@@ -0,0 +1,56 @@
+import sys
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+from game import export
+
+
+class Command(BaseCommand) :
+    help = 'Stream grids to NDJSON or CSV without loading the table into memory'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--format', choices=export.FORMATS, default='ndjson')
+        parser.add_argument('--output', help='File to write (default: stdout)')
+        parser.add_argument('--difficulty')
+        parser.add_argument('--source')
+        parser.add_argument('--date-from', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--date-to', help='YYYY-MM-DD, inclusive')
+        parser.add_argument('--owner', help='Username of the creator')
+        parser.add_argument('--public', action='store_true', help='Only public grids')
+        parser.add_argument('--solution', action='store_true', help='Include the stored solution')
+        parser.add_argument('--chunk-size', type=int, default=2000, help='Rows fetched per database round trip')
+
+    def handle(self, *args, **options) :
+        dates = {}
+        for name in ('date_from', 'date_to') :
+            if options[name] :
+                dates[name] = parse_date(options[name])
+                if dates[name] is None :
+                    raise CommandError(f"--{name.replace('_', '-')} must be YYYY-MM-DD")
+
+        grids = export.export_queryset(options['difficulty'], options['source'], owner=options['owner'], **dates)
+        if options['public'] :
+            grids = grids.filter(is_public=True)
+        columns = export.columns_for(options['solution'])
+        rows = export.export_rows(grids, columns, options['chunk_size'])
+
+        out = open(options['output'], 'w', newline='') if options['output'] else sys.stdout
+        start = time.perf_counter()
+        try :
+            for block in export.blocks(export.export_lines(options['format'], columns, self.counted(rows))) :
+                out.write(block)
+        finally :
+            if options['output'] :
+                out.close()
+        count = self.count
+        elapsed = time.perf_counter() - start
+        # Progress goes to stderr so stdout stays a clean export
+        self.stderr.write(self.style.SUCCESS(
+            f'Exported {count} grids in {elapsed:.1f}s ({count / elapsed if elapsed else 0:.0f} rows/s)'))
+
+    def counted(self, rows) :
+        self.count = 0
+        for row in rows :
+            self.count += 1
+            yield row
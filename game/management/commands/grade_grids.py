@@ -0,0 +1,43 @@
+from django.core.management import BaseCommand
+from django.utils import timezone
+from game.grader import grade
+from game.models import Grid
+
+
+class Command(BaseCommand) :
+    help = 'Grade stored grids by the solving techniques they need and update their difficulty'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--all', action='store_true', help='Regrade grids that already have a grade')
+        parser.add_argument('--batch-size', type=int, default=500)
+
+    def handle(self, *args, **options) :
+        batch_size = options['batch_size']
+        # The grader only knows 9x9 techniques
+        grids = Grid.objects.filter(size=9).only('id', 'grid', 'difficulty')
+        if not options['all'] :
+            grids = grids.filter(grade__isnull=True)
+
+        self.stdout.write(self.style.WARNING(f'Found {grids.count()} grids to grade'))
+
+        batch = []
+        levels = {}
+        for grid in grids.iterator(chunk_size=batch_size) :
+            result = grade(grid.grid)
+            if result is None :
+                self.stdout.write(f"Grid {grid.id}: cannot be graded (unsolvable)")
+                continue
+            grid.set_grade(result)
+            # bulk_update skips auto_now; the API caches key on updated_at
+            grid.updated_at = timezone.now()
+            levels[grid.difficulty] = levels.get(grid.difficulty, 0) + 1
+            batch.append(grid)
+            if len(batch) >= batch_size :
+                Grid.objects.bulk_update(batch, ['grade', 'technique', 'difficulty', 'updated_at'])
+                batch = []
+        if batch :
+            Grid.objects.bulk_update(batch, ['grade', 'technique', 'difficulty', 'updated_at'])
+
+        for level, count in sorted(levels.items()) :
+            self.stdout.write(f'  {level}: {count}')
+        self.stdout.write(self.style.SUCCESS('Done!'))
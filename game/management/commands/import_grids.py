@@ -0,0 +1,82 @@
+import gzip
+import os
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from itertools import islice
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+from game.batch import check_grid
+from game.models import Grid
+from game.sudoku import SOLVER_VERSION
+from game.utile import setting
+
+
+class Command(BaseCommand) :
+    help = 'Import puzzles from a file with one 81-character grid per line (plain or .gz)'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('path')
+        parser.add_argument('--gzip', action='store_true', help='Read the file as gzip even without a .gz suffix')
+        parser.add_argument('--chunk-size', type=int, default=1000,
+                            help='Lines validated and inserted per transaction')
+        parser.add_argument('--workers', type=int, default=0, help='Validation processes (0 = one per CPU)')
+        parser.add_argument('--source', default=None, help='Defaults to the file name')
+        parser.add_argument('--private', action='store_true')
+
+    def handle(self, *args, **options) :
+        path = options['path']
+        if not os.path.exists(path) :
+            raise CommandError(f'{path} does not exist')
+        source = options['source'] or os.path.basename(path)
+        chunk_size = options['chunk_size']
+        opener = gzip.open if options['gzip'] or path.endswith('.gz') else open
+        check = partial(check_grid, engine=setting('SUDOKU_SOLVER_ENGINE', 'classic'))
+
+        read = imported = duplicates = 0
+        rejects = Counter()
+        start = time.perf_counter()
+
+        with opener(path, 'rt') as lines, ProcessPoolExecutor(max_workers=options['workers'] or None) as pool :
+            grids = (line.split(',')[0].strip() for line in lines if line.strip() and not line.startswith('#'))
+            while True :
+                chunk = list(islice(grids, chunk_size))
+                if not chunk :
+                    break
+                read += len(chunk)
+
+                checked = {}
+                for grid, key, solution, result, reason in pool.map(check, chunk, chunksize=max(1, chunk_size // 32)) :
+                    if reason :
+                        rejects[reason] += 1
+                    elif grid in checked :
+                        duplicates += 1
+                    else :
+                        checked[grid] = (key, solution, result)
+
+                existing = set(Grid.objects.filter(grid__in=list(checked)).values_list('grid', flat=True))
+                duplicates += len(existing)
+                now = timezone.now()
+                rows = []
+                for grid, (key, solution, result) in checked.items() :
+                    if grid not in existing :
+                        row = Grid(grid=grid, canonical_key=key, solution=solution, solved_at=now,
+                                   solver_version=SOLVER_VERSION, source=source, is_public=not options['private'])
+                        row.set_grade(result)
+                        rows.append(row)
+                with transaction.atomic() :
+                    Grid.objects.bulk_create(rows, batch_size=500)
+                imported += len(rows)
+
+                elapsed = time.perf_counter() - start
+                self.stdout.write(f'{read} read, {imported} imported, {duplicates} duplicates, '
+                                  f'{sum(rejects.values())} rejected ({read / elapsed:.0f} rows/s)')
+
+        elapsed = time.perf_counter() - start
+        for reason, count in rejects.most_common() :
+            self.stdout.write(self.style.WARNING(f'  rejected: {count} {reason}'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Imported {imported} of {read} grids in {elapsed:.1f}s ({read / elapsed if elapsed else 0:.0f} rows/s)'))
@@ -0,0 +1,64 @@
+import time
+from collections import Counter
+
+from django.core.management import BaseCommand
+from django.db.models import BinaryField, Count
+from django.db.models.functions import Cast
+from game.models import Grid
+from game.vectorized import check_packed
+
+
+class Command(BaseCommand) :
+    help = 'Check every stored 9x9 grid for duplicate digits and solvability in NumPy batches'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--chunk-size', type=int, default=10000, help='Grids checked per batch')
+        parser.add_argument('--show', type=int, default=20, help='Problem ids listed per status')
+        parser.add_argument('--check-solutions', action='store_true',
+                            help='Also compare against the stored solution column')
+
+    def handle(self, *args, **options) :
+        chunk_size = options['chunk_size']
+        fields = ('id', 'packed', 'solution') if options['check_solutions'] else ('id', 'packed')
+        # The grid column is read as raw bytes and decoded per chunk in NumPy, not row by row
+        rows = (Grid.objects.filter(size=9).order_by().annotate(packed=Cast('grid', BinaryField()))
+                .values_list(*fields).iterator(chunk_size=chunk_size))
+
+        statuses = Counter()
+        problems = {}
+        total = 0
+        start = time.perf_counter()
+
+        def flush(chunk) :
+            results = check_packed([row[1] for row in chunk])
+            for row, (status, solution) in zip(chunk, results) :
+                if options['check_solutions'] and solution and row[2] and row[2] != solution :
+                    status = 'solution mismatch'
+                statuses[status] += 1
+                if not solution or status == 'solution mismatch' :
+                    problems.setdefault(status, []).append(row[0])
+
+        chunk = []
+        for row in rows :
+            chunk.append(row)
+            if len(chunk) == chunk_size :
+                flush(chunk)
+                total += len(chunk)
+                chunk = []
+                self.stdout.write(f'{total} checked ({total / (time.perf_counter() - start):.0f} grids/s)')
+        if chunk :
+            flush(chunk)
+            total += len(chunk)
+
+        elapsed = time.perf_counter() - start
+        for status, count in statuses.most_common() :
+            self.stdout.write(f'  {status}: {count}')
+        for status, ids in problems.items() :
+            shown = ', '.join(str(pk) for pk in ids[:options['show']])
+            self.stdout.write(self.style.WARNING(f'  {status} ids: {shown}{" ..." if len(ids) > options["show"] else ""}'))
+
+        repeated = Grid.objects.values('grid').annotate(n=Count('id')).filter(n__gt=1).count()
+        if repeated :
+            self.stdout.write(self.style.WARNING(f'  {repeated} grids are stored more than once'))
+        self.stdout.write(self.style.SUCCESS(
+            f'Checked {total} grids in {elapsed:.1f}s ({total / elapsed if elapsed else 0:.0f} grids/s)'))
@@ -0,0 +1,90 @@
+import os
+import random
+import socket
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management import BaseCommand
+from django.db.models import F
+from django.utils import timezone
+from game.generator import generate
+from game.models import Grid, GenerationJob, generator_setting
+
+
+class Command(BaseCommand) :
+    help = 'Generate puzzles from the job queue, keeping every difficulty stocked above a watermark'
+
+    def add_arguments(self, parser) :
+        parser.add_argument('--processes', type=int, default=0, help='Generator processes (0 = one per CPU)')
+        parser.add_argument('--watermark', type=int, default=None,
+                            help='Public puzzles to keep per difficulty (default: SUDOKU_GENERATOR WATERMARK)')
+        parser.add_argument('--job-size', type=int, default=None, help='Puzzles per queued job')
+        parser.add_argument('--no-refill', action='store_true', help='Only run queued jobs, never queue new ones')
+        parser.add_argument('--once', action='store_true', help='Exit when the queue is empty instead of polling')
+        parser.add_argument('--poll', type=float, default=5.0, help='Seconds between checks of an empty queue')
+
+    def handle(self, *args, **options) :
+        watermark = options['watermark'] or generator_setting('WATERMARK', 20)
+        job_size = options['job_size'] or generator_setting('JOB_SIZE', 10)
+        stale_after = generator_setting('STALE_AFTER', 600)
+        worker = f'{socket.gethostname()}:{os.getpid()}'
+        processes = options['processes'] or os.cpu_count()
+
+        self.produced = self.tried = 0
+        start = time.perf_counter()
+        self.stdout.write(f'Worker {worker} with {processes} processes, watermark {watermark}')
+        try :
+            with ProcessPoolExecutor(max_workers=processes) as pool :
+                while True :
+                    if not options['no_refill'] :
+                        for job in GenerationJob.objects.refill(watermark, job_size) :
+                            self.stdout.write(f'Queued job {job.id}: {job.count} {job.difficulty}')
+                    job = GenerationJob.objects.claim(worker, stale_after)
+                    if job is None :
+                        if options['once'] :
+                            break
+                        time.sleep(options['poll'])
+                        continue
+                    self.run_job(job, pool)
+        except KeyboardInterrupt :
+            self.stdout.write('Interrupted')
+
+        elapsed = time.perf_counter() - start
+        self.stdout.write(self.style.SUCCESS(
+            f'Generated {self.produced} puzzles from {self.tried} full grids in {elapsed:.1f}s '
+            f'({self.produced / elapsed if elapsed else 0:.2f} puzzles/s)'))
+
+    def run_job(self, job, pool) :
+        start = time.perf_counter()
+        futures = [pool.submit(generate, job.difficulty, random.getrandbits(64))
+                   for _ in range(job.count - job.produced)]
+        produced = failed = 0
+        try :
+            for future in as_completed(futures) :
+                result = future.result()
+                if result is None :
+                    failed += 1
+                    continue
+                Grid.objects.create_generated(result)
+                produced += 1
+                self.tried += result.tries
+                GenerationJob.objects.filter(pk=job.pk).update(produced=F('produced') + 1, heartbeat_at=timezone.now())
+        except Exception as e :
+            for future in futures :
+                future.cancel()
+            GenerationJob.objects.filter(pk=job.pk).update(status=GenerationJob.FAILED, error=repr(e),
+                                                           finished_at=timezone.now())
+            self.stdout.write(self.style.ERROR(f'Job {job.id} failed: {e!r}'))
+            raise
+
+        done = job.produced + produced >= job.count
+        GenerationJob.objects.filter(pk=job.pk).update(
+            status=GenerationJob.DONE if done else GenerationJob.FAILED,
+            error='' if done else f'{failed} generations found no {job.difficulty} puzzle',
+            finished_at=timezone.now())
+        self.produced += produced
+
+        elapsed = time.perf_counter() - start
+        style = self.style.SUCCESS if done else self.style.WARNING
+        self.stdout.write(style(f'Job {job.id}: {produced} {job.difficulty} puzzles in {elapsed:.1f}s '
+                                f'({produced / elapsed if elapsed else 0:.2f}/s), {failed} gave up'))
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid',
+            name='solution',
+            field=models.CharField(blank=True, default='', max_length=81),
+        ),
+        migrations.AddField(
+            model_name='grid',
+            name='solved_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='grid',
+            name='solver_version',
+            field=models.CharField(blank=True, default='', max_length=20),
+        ),
+    ]
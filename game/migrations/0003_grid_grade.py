@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0002_grid_solution'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid',
+            name='grade',
+            field=models.PositiveSmallIntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='grid',
+            name='technique',
+            field=models.CharField(blank=True, default='', max_length=30),
+        ),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.2.7 on 2026-10-18 17:53
+
+from random import random
+
+import game.models
+from django.conf import settings
+from django.db import migrations, models
+
+
+def randomize_keys(apps, schema_editor):
+    # AddField evaluates the callable default once, so existing rows all share one key
+    Grid = apps.get_model('game', 'Grid')
+    batch = []
+    for grid in Grid.objects.only('id').iterator(chunk_size=1000):
+        grid.random_key = random()
+        batch.append(grid)
+        if len(batch) >= 1000:
+            Grid.objects.bulk_update(batch, ['random_key'])
+            batch = []
+    if batch:
+        Grid.objects.bulk_update(batch, ['random_key'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0003_grid_grade'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid',
+            name='random_key',
+            field=models.FloatField(default=game.models.new_random_key),
+        ),
+        migrations.RunPython(randomize_keys, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='grid',
+            index=models.Index(fields=['difficulty', 'is_public'], name='grid_difficulty_public_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='grid',
+            index=models.Index(condition=models.Q(('is_public', True)), fields=['difficulty', 'random_key'], name='grid_public_random_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+import game.fields
+from django.db import migrations, models
+
+FIELDS = [('grid', 'packed_grid'), ('solution', 'packed_solution')]
+
+
+def copy_grids(apps, sources, targets):
+    Grid = apps.get_model('game', 'Grid')
+    batch = []
+    for grid in Grid.objects.only('id', *sources).iterator(chunk_size=1000):
+        for source, target in zip(sources, targets):
+            setattr(grid, target, getattr(grid, source))
+        batch.append(grid)
+        if len(batch) >= 1000:
+            Grid.objects.bulk_update(batch, targets)
+            batch = []
+    if batch:
+        Grid.objects.bulk_update(batch, targets)
+
+
+def pack(apps, schema_editor):
+    text, packed = zip(*FIELDS)
+    copy_grids(apps, text, packed)
+
+
+def unpack(apps, schema_editor):
+    text, packed = zip(*FIELDS)
+    copy_grids(apps, packed, text)
+
+
+class Migration(migrations.Migration):
+    # grid and solution go from 81-char text to 41 packed bytes (game.fields.PackedGridField)
+
+    dependencies = [
+        ('game', '0004_grid_random_key'),
+    ]
+
+    operations = [
+        # Nullable first, so that unapplying can re-add the text column before refilling it
+        migrations.AlterField(
+            model_name='grid',
+            name='grid',
+            field=models.CharField(max_length=81, null=True),
+        ),
+        migrations.AddField(
+            model_name='grid',
+            name='packed_grid',
+            field=game.fields.PackedGridField(null=True),
+        ),
+        migrations.AddField(
+            model_name='grid',
+            name='packed_solution',
+            field=game.fields.PackedGridField(blank=True, default=''),
+        ),
+        migrations.RunPython(pack, unpack),
+        migrations.RemoveField(model_name='grid', name='grid'),
+        migrations.RemoveField(model_name='grid', name='solution'),
+        migrations.RenameField(model_name='grid', old_name='packed_grid', new_name='grid'),
+        migrations.RenameField(model_name='grid', old_name='packed_solution', new_name='solution'),
+        migrations.AlterField(
+            model_name='grid',
+            name='grid',
+            field=game.fields.PackedGridField(),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:07
+
+import game.fields
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0005_pack_grids'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid',
+            name='canonical_key',
+            field=game.fields.PackedGridField(blank=True, default=''),
+        ),
+        migrations.AddIndex(
+            model_name='grid',
+            index=models.Index(fields=['canonical_key'], name='grid_canonical_key_idx'),
+        ),
+    ]
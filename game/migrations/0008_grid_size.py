@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:27
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0007_generationjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid',
+            name='size',
+            field=models.PositiveSmallIntegerField(choices=[(4, '4x4'), (9, '9x9'), (16, '16x16'), (25, '25x25')], default=9),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:31
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0008_grid_size'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='grid',
+            index=models.Index(fields=['created_by', 'date', 'id'], name='grid_owner_date_idx'),
+        ),
+    ]
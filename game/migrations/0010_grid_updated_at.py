@@ -0,0 +1,18 @@
+# Generated by Django 5.2.7 on 2026-10-18 18:51
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('game', '0009_grid_owner_date_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='grid',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
@@ -1,16 +1,215 @@
+from datetime import timedelta
+from functools import partial
+from random import random
+
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q, Sum
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
 from django.utils import timezone
 
-# Create your models here.
+from .async_solver import async_cached_solve, run_solver
+from .boards import SIZES, geometry
+from .canonical import canonical_form
+from .check_plan import forget_plan
+from .fields import PackedGridField
+from .generator import LEVELS
+from .rendering import forget_boards
+from .solution_cache import cached_solve
+from .sudoku import solve, SOLVER_VERSION
+from .utile import grid_values, option
+
+
+def new_random_key():
+    return random()
+
+
+class GridManager(models.Manager):
+    def random_public(self, difficulty):
+        # Every row carries a uniform random_key, so the first key at or after a random
+        # probe is one index seek instead of loading the whole difficulty bucket; an empty
+        # bucket comes back as None from the second first()
+        public = self.filter(difficulty=difficulty, is_public=True, size=9).order_by('random_key')
+        return public.filter(random_key__gte=random()).first() or public.first()
+
+    def equivalent(self, key):
+        # A solved puzzle with this canonical key, i.e. the same puzzle up to symmetry
+        return (self.filter(canonical_key=key).exclude(solution='')
+                .only('grid', 'solution', 'grade', 'technique', 'difficulty').first())
+
+    def create_generated(self, result):
+        # Stores a generator.Generated puzzle, already solved and graded
+        grid = self.model(grid=result.grid, canonical_key=result.canonical_key, solution=result.solution,
+                          solved_at=timezone.now(), solver_version=SOLVER_VERSION, source='generator')
+        grid.set_grade(result.grade)
+        grid.save()
+        return grid
+
+
 class Grid(models.Model):
-    grid = models.CharField(max_length=81)
+    SIZE_CHOICES = [(size, f'{size}x{size}') for size in SIZES]
+
+    size = models.PositiveSmallIntegerField(choices=SIZE_CHOICES, default=9)
+    grid = PackedGridField()
     difficulty = models.CharField(max_length=10, default='easy')
     source = models.CharField(max_length=255, default='Unknown')
     date = models.DateField(default=timezone.now)
     created_by = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True, related_name='puzzles')
     is_public = models.BooleanField(default=True)
+    solution = PackedGridField(blank=True, default='')
+    solved_at = models.DateTimeField(null=True, blank=True)
+    solver_version = models.CharField(max_length=20, blank=True, default='')
+    grade = models.PositiveSmallIntegerField(null=True, blank=True)
+    technique = models.CharField(max_length=30, blank=True, default='')
+    random_key = models.FloatField(default=new_random_key)
+    canonical_key = PackedGridField(blank=True, default='')
+    # Bumped by every save; bulk updates set it themselves (http_cache keys on it)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = GridManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['difficulty', 'is_public'], name='grid_difficulty_public_idx'),
+            models.Index(fields=['difficulty', 'random_key'], condition=Q(is_public=True), name='grid_public_random_idx'),
+            models.Index(fields=['canonical_key'], name='grid_canonical_key_idx'),
+            models.Index(fields=['created_by', 'date', 'id'], name='grid_owner_date_idx'),
+        ]
+
+    def __str__(self):
+        return f'Sudoku {self.id} from {self.source} date {self.date}'
+
+    @property
+    def geometry(self):
+        return geometry(self.size)
+
+    def set_solution(self, values):
+        # An empty solution with solved_at set marks an unsolvable grid
+        self.solution = ''.join(values[s] for s in self.geometry.squares) if values else ''
+        self.solved_at = timezone.now()
+        self.solver_version = SOLVER_VERSION
+
+    def solution_values(self):
+        if not self.solution:
+            return False
+        return grid_values(self.solution) if self.size == 9 else self.geometry.values(self.solution)
+
+    def get_solution(self):
+        # The solution cache only holds 9x9 grids; other sizes go straight to the bitset engine
+        if self.solved_at is None:
+            self.set_solution(cached_solve(self.grid) if self.size == 9 else solve(self.grid))
+            if self.pk:
+                self.save(update_fields=['solution', 'solved_at', 'solver_version', 'updated_at'])
+        return self.solution_values()
+
+    async def aget_solution(self):
+        # For async views: a missing solution is computed on the solver pool (async_solver)
+        if self.solved_at is None:
+            self.set_solution(await async_cached_solve(self.grid) if self.size == 9
+                              else await run_solver(solve, self.grid))
+            if self.pk:
+                await self.asave(update_fields=['solution', 'solved_at', 'solver_version', 'updated_at'])
+        return self.solution_values()
+
+    def set_canonical(self):
+        # Canonical keys only exist for 9x9 grids
+        if self.size != 9:
+            return None
+        form = canonical_form(self.grid)
+        self.canonical_key = form.key
+        return form
+
+    def copy_equivalent(self):
+        # Sets the canonical key, then takes the solution and grade of a stored equivalent
+        # puzzle, mapped through both transforms; False when there is none
+        form = self.set_canonical()
+        other = form and Grid.objects.equivalent(form.key)
+        if not other:
+            return False
+        self.solution = form.from_canonical(canonical_form(other.grid).to_canonical(other.solution))
+        self.solved_at = timezone.now()
+        self.solver_version = SOLVER_VERSION
+        self.grade, self.technique, self.difficulty = other.grade, other.technique, other.difficulty
+        return True
+
+    def set_grade(self, result):
+        # result is a grader.Grade; difficulty follows the grade, not the submitter
+        if result:
+            self.grade = result.score
+            self.technique = result.technique
+            self.difficulty = result.difficulty
+
+
+@receiver(post_save, sender=Grid)
+@receiver(post_delete, sender=Grid)
+def forget_rendered_boards(sender, instance, **kwargs):
+    # Cached board fragments (rendering.py) follow every edit of the grid or its solution
+    forget_boards(instance.pk)
+
+
+@receiver(post_save, sender=Grid)
+@receiver(post_delete, sender=Grid)
+def forget_check_plan(sender, instance, **kwargs):
+    forget_plan(instance.pk)
+
+
+generator_setting = partial(option, 'SUDOKU_GENERATOR')
+
+
+class GenerationJobManager(models.Manager):
+    def refill(self, watermark, job_size, levels=LEVELS):
+        # Queue jobs for buckets whose public stock plus what is already queued is below the watermark
+        queued = dict(self.filter(status__in=[GenerationJob.PENDING, GenerationJob.RUNNING])
+                      .values('difficulty').annotate(n=Sum(F('count') - F('produced')))
+                      .values_list('difficulty', 'n'))
+        jobs = []
+        for difficulty in levels:
+            stock = Grid.objects.filter(difficulty=difficulty, is_public=True).count()
+            missing = watermark - stock - (queued.get(difficulty) or 0)
+            while missing > 0:
+                jobs.append(self.create(difficulty=difficulty, count=min(job_size, missing)))
+                missing -= job_size
+        return jobs
+
+    def claim(self, worker, stale_after):
+        # Pending jobs, or running ones whose worker stopped reporting. skip_locked keeps
+        # workers off each other's rows; the conditional update covers databases without
+        # row locks (SQLite), where only one worker's update matches.
+        now = timezone.now()
+        stale = now - timedelta(seconds=stale_after)
+        open_jobs = Q(status=GenerationJob.PENDING) | Q(status=GenerationJob.RUNNING, heartbeat_at__lt=stale)
+        with transaction.atomic():
+            for job in self.select_for_update(skip_locked=True).filter(open_jobs).order_by('created_at')[:10]:
+                claimed = self.filter(pk=job.pk, status=job.status, heartbeat_at=job.heartbeat_at).update(
+                    status=GenerationJob.RUNNING, worker=worker, started_at=now, heartbeat_at=now)
+                if claimed:
+                    job.status, job.worker, job.started_at, job.heartbeat_at = GenerationJob.RUNNING, worker, now, now
+                    return job
+        return None
+
+
+class GenerationJob(models.Model):
+    PENDING, RUNNING, DONE, FAILED = 'pending', 'running', 'done', 'failed'
+    STATUS_CHOICES = [(PENDING, 'Pending'), (RUNNING, 'Running'), (DONE, 'Done'), (FAILED, 'Failed')]
+
+    difficulty = models.CharField(max_length=10)
+    count = models.PositiveIntegerField(default=10)
+    produced = models.PositiveIntegerField(default=0)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    worker = models.CharField(max_length=100, blank=True, default='')
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+    error = models.TextField(blank=True, default='')
+
+    objects = GenerationJobManager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='job_status_created_idx'),
+        ]
 
     def __str__(self):
-        owner = self.created_by.username if self.created_by else 'Anonymous'
-        return f'Sudoku {self.id} from {self.source} date {self.date}'
\ No newline at end of file
+        return f'Generate {self.count} {self.difficulty} puzzles ({self.status}, {self.produced} done)'
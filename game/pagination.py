@@ -0,0 +1,68 @@
+# -*- coding: utf-8 -*-
+# Keyset (seek) pagination over (date, id), newest first. A page is the rows strictly past
+# the last one shown, found by an index seek on (created_by, date, id) however deep the
+# page is, where OFFSET would read and throw away every earlier row. Cursors are the
+# boundary row's 'date.id'.
+from collections import namedtuple
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.pagination import CursorPagination
+
+from .utile import setting
+
+KeysetPage = namedtuple('KeysetPage', ['items', 'older', 'newer'])
+
+
+def page_size():
+    return setting('SUDOKU_PAGE_SIZE', 25)
+
+
+def encode_cursor(grid):
+    return f'{grid.date.isoformat()}.{grid.id}'
+
+
+def decode_cursor(value):
+    # (date, id), or None for a missing or malformed cursor
+    try:
+        day, pk = value.split('.')
+        return date.fromisoformat(day), int(pk)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_page(queryset, before=None, after=None, size=None):
+    """One page of queryset, newest first.
+
+    before: cursor of the last row already shown, to go to older rows; after: cursor of
+    the first row shown, to go back to newer ones. older / newer are the cursors for the
+    neighbouring pages, None at either end.
+    """
+    size = size or page_size()
+    if after:
+        day, pk = after
+        rows = list(queryset.filter(Q(date__gt=day) | Q(date=day, id__gt=pk)).order_by('date', 'id')[:size + 1])
+        more = len(rows) > size
+        rows = rows[:size][::-1]
+        return KeysetPage(rows, encode_cursor(rows[-1]) if rows else None,
+                          encode_cursor(rows[0]) if more else None)
+
+    if before:
+        day, pk = before
+        queryset = queryset.filter(Q(date__lt=day) | Q(date=day, id__lt=pk))
+    rows = list(queryset.order_by('-date', '-id')[:size + 1])
+    more = len(rows) > size
+    rows = rows[:size]
+    return KeysetPage(rows, encode_cursor(rows[-1]) if more else None,
+                      encode_cursor(rows[0]) if before and rows else None)
+
+
+class PuzzleCursorPagination(CursorPagination):
+    # DRF's own keyset pagination on the same ordering and index
+    ordering = ('-date', '-id')
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def get_page_size(self, request):
+        self.page_size = page_size()
+        return super().get_page_size(request)
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+# Board HTML for grid.html, assembled from per-cell strings computed once per board size
+# instead of building a form field and running a filter per cell on every render. The
+# markup is what SudokuForm's widgets produced, so the page scripts see the same inputs. Boards of a
+# stored puzzle (its givens, its solution) are the same for every visitor and are cached
+# per grid id; models drops them whenever the grid is saved or deleted.
+from collections import namedtuple
+from functools import lru_cache
+
+from django.core.cache import cache
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+from .boards import ROW_NAMES, geometry, size_of
+from .forms import cell_pattern
+from .utile import setting
+
+KINDS = ('givens', 'solution')
+
+Tables = namedtuple('Tables', ['size', 'header', 'row_open', 'td_open', 'given', 'open', 'filled'])
+
+
+@lru_cache(maxsize=None)
+def tables(size):
+    # Per-cell strings for one board size; box edges get the right/bottom borders
+    geo = geometry(size)
+    last = size - 1
+    edge = [c % geo.box == geo.box - 1 and c != last for c in range(size)]
+    td_classes = [f"{'right' if edge[c] else ''} {'bottom' if edge[r] else ''}".strip()
+                  for r in range(size) for c in range(size)]
+    attrs = (f'maxlength="1" inputmode="{"numeric" if size <= 9 else "text"}" '
+             f'pattern="{cell_pattern(size)}" autocomplete="off"')
+    return Tables(
+        size,
+        '<tr><td class="first_index"></td>' + ''.join(f'<td class="top_index">{c}</td>' for c in range(1, size + 1)) + '</tr>',
+        [f'<tr><td class="left_index">{r}</td>' for r in ROW_NAMES[:size]],
+        [f'<td class="{cls}">' if cls else '<td>' for cls in td_classes],
+        [f'<input type="text" name="{s}" value="%s" class="cell initial-cell" {attrs} readonly="readonly" id="id_{s}">'
+         for s in geo.squares],
+        [f'<input type="text" name="{s}" class="cell" {attrs} id="id_{s}">' for s in geo.squares],
+        [f'<input type="text" name="{s}" value="%s" class="cell" {attrs} id="id_{s}">' for s in geo.squares],
+    )
+
+
+_readonly = '<input type="text" class="cell initial-cell" value="%s" readonly>'
+
+
+def table(cells, size=9):
+    # cells: size * size HTML snippets in square order
+    t = tables(size)
+    out = ['<table class="board" align="center">', t.header]
+    for r in range(size):
+        out.append(t.row_open[r])
+        for i in range(size * r, size * r + size):
+            out.append(t.td_open[i])
+            out.append(cells[i])
+            out.append('</td>')
+        out.append('</tr>')
+    out.append('</table>')
+    return ''.join(out)
+
+
+def givens_board(grid, values=None):
+    # The playing board: givens read-only, other cells editable, prefilled from values
+    # (the player's posted cells) when given
+    size = size_of(grid)
+    t = tables(size)
+    symbols = geometry(size).bit
+    cells = []
+    for i, s in enumerate(geometry(size).squares):
+        if grid[i] in symbols:
+            cells.append(t.given[i] % grid[i])
+        elif values and values.get(s):
+            cells.append(t.filled[i] % escape(values[s]))
+        else:
+            cells.append(t.open[i])
+    return table(cells, size)
+
+
+def solution_board(solution, size=9):
+    if not solution:
+        return empty_board(size)
+    return table([_readonly % d for d in solution], size)
+
+
+def empty_board(size=9):
+    return table([''] * (size * size), size)
+
+
+def board_key(pk, kind):
+    return f'sudoku:board:{kind}:{pk}'
+
+
+def cached_board(grid_obj, kind='givens'):
+    # Anything but 'solution' (an unset template variable included) is the playing board
+    kind = 'solution' if kind == 'solution' else 'givens'
+    key = board_key(grid_obj.pk, kind)
+    html = cache.get(key)
+    if html is None:
+        html = solution_board(grid_obj.solution, grid_obj.size) if kind == 'solution' else givens_board(grid_obj.grid)
+        cache.set(key, html, setting('SUDOKU_BOARD_CACHE_TTL', 3600))
+    return html
+
+
+def forget_boards(pk):
+    cache.delete_many([board_key(pk, kind) for kind in KINDS])
+
+
+def render_board(grid_obj=None, kind='givens', values=None):
+    if grid_obj is None:
+        return mark_safe(empty_board())
+    if values:
+        return mark_safe(givens_board(grid_obj.grid, values))
+    return mark_safe(cached_board(grid_obj, kind))
@@ -1,22 +1,70 @@
+from django.utils import timezone
 from rest_framework import serializers
+from .batch import batch_setting
+from .boards import SYMBOLS, is_valid_grid
+from .fields import SIZE_CHARS
+from .grader import grade
 from .models import Grid
-from .sudoku import solve, is_valid_input
+from .sudoku import count_solutions
 
 
 class GridSerializer(serializers.ModelSerializer):
+    grid = serializers.RegexField(r'^[0-9A-P.]+$', error_messages={'invalid': 'Grids are written with 1-9 (then A-P for 16x16 and 25x25), 0 or .'})
+
     class Meta:
         model = Grid
-        fields = ['id', 'grid', 'difficulty', 'date']
+        fields = ['id', 'size', 'grid', 'difficulty', 'grade', 'technique', 'date']
+        read_only_fields = ['difficulty', 'grade', 'technique']
 
     def validate(self, data):
         grid_string = data.get('grid')
-        rows, cols = 'ABCDEFGHI', '123456789'
-        grid_dict = {f"{rows[i // 9]}{cols[i % 9]}" :char for i, char in enumerate(grid_string)}
+        size = data.get('size', 9)
+        if len(grid_string) != size * size :
+            raise serializers.ValidationError({'grid': f'A {size}x{size} grid has {size * size} cells.'})
+        if not SIZE_CHARS[size].issuperset(grid_string) :
+            symbols = f'1-{SYMBOLS[size - 1]}' if size <= 9 else f'1-9 and A-{SYMBOLS[size - 1]}'
+            raise serializers.ValidationError({'grid': f'A {size}x{size} grid is written with {symbols}, 0 or .'})
 
-        if not is_valid_input(grid_dict) :
+        if not is_valid_grid(grid_string, size) :
             raise serializers.ValidationError('Duplicate numbers found in row, column, or block.')
 
-        if not solve(grid_string) :
+        solutions = count_solutions(grid_string)
+        if not solutions :
             raise serializers.ValidationError('This puzzle is unsolvable.')
+        if solutions > 1 :
+            raise serializers.ValidationError('This puzzle has more than one solution.')
+        return data
+
+    def create(self, validated_data):
+        # The model default is timezone.now, a datetime the date field refuses to render
+        validated_data.setdefault('date', timezone.localdate())
+        grid = Grid(**validated_data)
+        if not grid.copy_equivalent():
+            grid.get_solution()
+            # The grader only knows 9x9 techniques
+            if grid.size == 9:
+                grid.set_grade(grade(grid.grid))
+        grid.save()
+        return grid
+
+
+class BatchSolveSerializer(serializers.Serializer):
+    grids = serializers.ListField(
+        child=serializers.RegexField(r'^[0-9.]{81}$', error_messages={'invalid': 'Grids must be 81 characters of 1-9, 0 or .'}),
+        required=False
+    )
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False)
+    time_budget = serializers.FloatField(required=False, min_value=0.01)
+
+    def validate(self, data):
+        items = data.get('grids') or data.get('ids')
+        if not items or ('grids' in data and 'ids' in data):
+            raise serializers.ValidationError('Send either a list of grids or a list of ids.')
+
+        max_grids = batch_setting('MAX_GRIDS', 100)
+        if len(items) > max_grids:
+            raise serializers.ValidationError(f'A batch can hold at most {max_grids} grids.')
 
-        return data
\ No newline at end of file
+        max_budget = batch_setting('TIME_BUDGET', 10)
+        data['time_budget'] = min(data.get('time_budget', max_budget), max_budget)
+        return data
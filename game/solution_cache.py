@@ -0,0 +1,90 @@
+import os
+import threading
+
+from django.core.cache import caches
+
+from .lru import LRUCache
+from .sudoku import solve, squares, digits, SolveStats, SOLVER_VERSION
+from .utile import grid_values, option, setting
+
+
+def normalize(grid):
+    # Same characters grid_values keeps, with '0' and '.' both meaning empty
+    return ''.join(c if c in digits else '.' for c in grid if c in digits or c in '0.')[:81]
+
+
+# Bounded LRU of solved grids, optionally backed by a Django cache shared between workers.
+# Entries are 81-char strings ('' for unsolvable grids) turned into a fresh dict on every
+# hit, so callers can mutate what they get back.
+class SolutionCache:
+    def __init__(self, max_entries=4096, ttl=None, cache_alias=None):
+        self.local = LRUCache(max_entries, ttl)
+        self.ttl = ttl
+        self.cache_alias = cache_alias or None
+        self._lock = threading.Lock()
+        self.shared_hits = self.shared_misses = 0
+
+    def solve(self, grid, cancel=None):
+        key = normalize(grid)
+        value = self.local.get(key)
+        if value is None:
+            value = self._get_shared(key)
+            if value is None:
+                # With SUDOKU_SOLVER_STATS on, every real solve is logged to 'game.solver'
+                solution = solve(key, stats=SolveStats() if setting('SUDOKU_SOLVER_STATS', False) else None,
+                                 cancel=cancel)
+                value = ''.join(solution[s] for s in squares) if solution else ''
+                self._set_shared(key, value)
+            self.local.set(key, value)
+        return grid_values(value) if value else False
+
+    def clear(self):
+        self.local.clear()
+
+    def stats(self):
+        with self._lock:
+            shared = {
+                'shared_cache': self.cache_alias,
+                'shared_hits': self.shared_hits,
+                'shared_misses': self.shared_misses,
+            }
+        return {'pid': os.getpid(), **self.local.stats(), **shared}
+
+    def _shared_key(self, key):
+        return f'sudoku:solution:{SOLVER_VERSION}:{key}'
+
+    def _get_shared(self, key):
+        if not self.cache_alias:
+            return None
+        value = caches[self.cache_alias].get(self._shared_key(key))
+        with self._lock:
+            if value is None:
+                self.shared_misses += 1
+            else:
+                self.shared_hits += 1
+        return value
+
+    def _set_shared(self, key, value):
+        if self.cache_alias:
+            caches[self.cache_alias].set(self._shared_key(key), value, self.ttl or None)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_solution_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = SolutionCache(
+                    max_entries=option('SUDOKU_SOLUTION_CACHE', 'MAX_ENTRIES', 4096),
+                    ttl=option('SUDOKU_SOLUTION_CACHE', 'TTL'),
+                    cache_alias=option('SUDOKU_SOLUTION_CACHE', 'CACHE_ALIAS'),
+                )
+    return _cache
+
+
+def cached_solve(grid, cancel=None):
+    return get_solution_cache().solve(grid, cancel)
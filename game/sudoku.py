@@ -1,5 +1,14 @@
 # -*- coding: utf-8 -*-
-from .utile import grid_values, cross
+import json
+import logging
+import time
+from collections import namedtuple
+
+from . import bitmask, bitset, dlx, trail
+from .boards import size_of
+from .utile import grid_values, cross, setting, SolveCancelled
+
+logger = logging.getLogger('game.solver')
 
 
 def parse_grid(grid):
@@ -39,13 +48,47 @@ def eliminate(values, s, d):
     return values
 
 
-def search(values):
+def search(values, stats=None, depth=0, cancel=None):
     if not values:
         return False
+    if cancel is not None and cancel.is_set():
+        raise SolveCancelled
     if all(len(values[s]) == 1 for s in values):
         return values
     n, s = min((len(values[s]), s) for s in squares if len(values[s]) > 1)
-    return some(search(assign(values.copy(), s, d)) for d in values[s])
+    if stats is None:
+        return some(search(assign(values.copy(), s, d), cancel=cancel) for d in values[s])
+
+    for d in values[s]:
+        trial = values.copy()
+        ok = assign(trial, s, d)
+        stats.node(depth + 1, *progress(values, trial), failed=not ok)
+        result = ok and search(trial, stats, depth + 1, cancel)
+        if result:
+            return result
+    return False
+
+
+def progress(before, after):
+    # (eliminated candidates, newly fixed cells) between two search states
+    before = [len(v) for v in before.values()]
+    after = [len(v) for v in after.values()]
+    return sum(before) - sum(after), after.count(1) - before.count(1)
+
+
+def count(values, limit):
+    # Like search, but keeps going until `limit` solutions have been seen
+    if not values:
+        return 0
+    if all(len(values[s]) == 1 for s in values):
+        return 1
+    n, s = min((len(values[s]), s) for s in squares if len(values[s]) > 1)
+    total = 0
+    for d in values[s]:
+        total += count(assign(values.copy(), s, d), limit - total)
+        if total >= limit:
+            break
+    return total
 
 
 def some(seq):
@@ -54,6 +97,39 @@ def some(seq):
             return e
     return False
 
+
+class SolveStats:
+    # Filled in by solve(grid, stats=SolveStats()); engines only pay for it when one is passed
+    def __init__(self):
+        self.engine = None
+        self.solved = None
+        self.wall_time = 0.0
+        self.nodes = 0
+        self.assignments = 0
+        self.eliminations = 0
+        self.max_depth = 0
+        self.backtracks = 0
+
+    def node(self, depth, eliminations, assignments, failed=False):
+        self.nodes += 1
+        self.backtracks += failed
+        self.eliminations += eliminations
+        self.assignments += assignments
+        if depth > self.max_depth:
+            self.max_depth = depth
+
+    def as_dict(self):
+        return {
+            'engine': self.engine,
+            'solved': self.solved,
+            'wall_time': round(self.wall_time, 6),
+            'nodes': self.nodes,
+            'assignments': self.assignments,
+            'eliminations': self.eliminations,
+            'max_depth': self.max_depth,
+            'backtracks': self.backtracks,
+        }
+
 def is_valid_input(grid_dict):
     for unit in unitlist:
         nums = [grid_dict[s] for s in unit if grid_dict[s] in '123456789']
@@ -61,8 +137,52 @@ def is_valid_input(grid_dict):
             return False
     return True
 
-def solve(grid):
-    return search(parse_grid(grid))
+SOLVER_VERSION = '2'
+
+
+def sized_engine(grid, engine):
+    # Only the bitset engine handles boards other than 9x9
+    if engine is None and size_of(grid) not in (None, 9):
+        return 'bitset'
+    return engine
+
+
+def solve(grid, engine=None, stats=None, cancel=None):
+    # cancel: a threading.Event; setting it makes the search raise SolveCancelled
+    engine = sized_engine(grid, engine)
+    if stats is None:
+        return get_engine(engine).solve(grid, cancel=cancel)
+
+    stats.engine = engine or setting('SUDOKU_SOLVER_ENGINE', 'classic')
+    start = time.perf_counter()
+    result = get_engine(stats.engine).solve(grid, stats, cancel)
+    stats.wall_time = time.perf_counter() - start
+    stats.solved = bool(result)
+    logger.info(json.dumps(dict(event='solve', grid=grid, **stats.as_dict())))
+    return result
+
+
+def count_solutions(grid, limit=2, engine=None):
+    return get_engine(sized_engine(grid, engine)).count_solutions(grid, limit)
+
+
+def solve_classic(grid, stats=None, cancel=None):
+    values = parse_grid(grid)
+    if stats is not None and values:
+        stats.node(0, *progress(dict.fromkeys(squares, digits), values))
+    return search(values, stats, cancel=cancel)
+
+
+def count_classic(grid, limit=2):
+    return count(parse_grid(grid), limit)
+
+
+def get_engine(name=None):
+    if name is None:
+        name = setting('SUDOKU_SOLVER_ENGINE', 'classic')
+    if name not in ENGINES:
+        raise ValueError(f'Unknown solver engine: {name}')
+    return ENGINES[name]
 
 
 def display(values):
@@ -88,6 +208,17 @@ unitlist = unit_c + unit_r + unit_sq
 units = dict((s, [u for u in unitlist if s in u]) for s in squares)
 peers = dict((s, set(sum(units[s], [])) - set([s])) for s in squares)
 
+Engine = namedtuple('Engine', ['solve', 'count_solutions'])
+
+ENGINES = {
+    'classic': Engine(solve_classic, count_classic),
+    'bitmask': Engine(bitmask.solve, bitmask.count_solutions),
+    'trail': Engine(trail.solve, trail.count_solutions),
+    'trail_degree': Engine(trail.solve_degree, trail.count_degree),
+    'bitset': Engine(bitset.solve, bitset.count_solutions),
+    'dlx': Engine(dlx.solve, dlx.count_solutions),
+}
+
 '''
 # ------------------------------------------------------------------------------------------------------------------- #
 
@@ -1,6 +1,12 @@
 from django import template
+from game.rendering import render_board
 register = template.Library()
 
+@register.simple_tag
+def sudoku_board(puzzle=None, kind='givens', values=None):
+    # Whole board in one call; see game/rendering.py
+    return render_board(puzzle, kind, values)
+
 @register.filter
 def get_field(form, field_name):
     return form[field_name]
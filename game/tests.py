@@ -1,3 +1,527 @@
-from django.test import TestCase
+import asyncio
+import random
+import json
+import threading
+from pathlib import Path
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+
+from .async_solver import run_solver
+from .boards import geometry
+from .canonical import canonical_form
+from .check_plan import PlanCache, check, compile_plan, get_plan_cache, plan_key
+from .fields import PackedGridField, pack, unpack
+from .lru import LRUCache
+from .models import Grid
+from .sudoku import solve
+from .utile import SolveCancelled
+from .views import check_plan, valid_entries
+from .vectorized import check_packed, load_grids, load_packed
+
+EASY = '003020600900305001001806400008102900700000008006708200002609500800203009005010300'
+HARD = '4.....8.5.3..........7......2.....6.....8.4......1.......6.3.7.5..2.....1.4......'
+EASY_SOLUTION = '483921657967345821251876493548132976729564138136798245372689514814253769695417382'
+SMALL = '1..4..1..3..4..2'
+SMALL_UNIQUE = '2...1.2........3'
+LARGE = ('1...5...9...D...' + '.2...6...A...E..' + '..3...7...B...F.' + '...4...8...C...G') * 4
+
+
+class PackTests(TestCase):
+    def test_9x9_round_trip(self):
+        packed = pack(EASY)
+        self.assertEqual(len(packed), 41)
+        self.assertEqual(unpack(packed), EASY.replace('0', '.'))
+        self.assertEqual(pack(EASY.replace('0', '.')), packed)
+        self.assertEqual(unpack(pack(EASY_SOLUTION)), EASY_SOLUTION)
+
+    def test_4x4_round_trip(self):
+        packed = pack(SMALL)
+        self.assertEqual(len(packed), 8)
+        self.assertEqual(unpack(packed), SMALL)
+        self.assertEqual(pack(SMALL.replace('.', '0')), packed)
+
+    def test_16x16_round_trip(self):
+        packed = pack(LARGE)
+        self.assertEqual(len(packed), 256)
+        self.assertEqual(unpack(packed), LARGE)
+        self.assertEqual(unpack(memoryview(packed)), LARGE)
+
+    def test_no_solution(self):
+        self.assertEqual(pack(''), b'')
+        self.assertEqual(unpack(b''), '')
+
+    def test_bad_lengths(self):
+        with self.assertRaises(ValueError):
+            pack(EASY[:80])
+        with self.assertRaises(ValueError):
+            unpack(b'\x00' * 40)
+
+    def test_packed_batches(self):
+        rows = [pack(EASY), pack(EASY_SOLUTION), b'\x00' * 40, b'\xff' * 41]
+        self.assertEqual(load_packed(rows[:2]).tolist(), load_grids([EASY, EASY_SOLUTION]).tolist())
+        self.assertEqual(check_packed(rows), [('propagated', EASY_SOLUTION), ('propagated', EASY_SOLUTION),
+                                              ('malformed', None), ('malformed', None)])
+
+    def test_bad_symbols(self):
+        with self.assertRaises(ValidationError):
+            PackedGridField().to_python(EASY[:80] + 'A')
+        with self.assertRaises(ValidationError):
+            PackedGridField().to_python(SMALL[:15] + '5')
+
+
+class PackedGridFieldTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.easy = Grid.objects.create(grid=EASY, solution=EASY_SOLUTION)
+        cls.small = Grid.objects.create(size=4, grid=SMALL)
+        cls.large = Grid.objects.create(size=16, grid=LARGE)
+
+    def test_saved_as_packed_bytes(self):
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT grid, solution FROM game_grid WHERE id = %s', [self.easy.pk])
+            grid, solution = cursor.fetchone()
+        self.assertEqual(bytes(grid), pack(EASY))
+        self.assertEqual(bytes(solution), pack(EASY_SOLUTION))
+
+    def test_loaded_as_text(self):
+        self.assertEqual(Grid.objects.get(pk=self.easy.pk).grid, EASY.replace('0', '.'))
+        self.assertEqual(Grid.objects.get(pk=self.small.pk).grid, SMALL)
+        self.assertEqual(Grid.objects.get(pk=self.large.pk).grid, LARGE)
+        self.assertEqual(Grid.objects.get(pk=self.small.pk).solution, '')
+
+    def test_exact_lookup(self):
+        self.assertEqual(Grid.objects.get(grid=EASY).pk, self.easy.pk)
+        self.assertEqual(Grid.objects.get(grid=EASY.replace('0', '.')).pk, self.easy.pk)
+        self.assertEqual(Grid.objects.get(grid=LARGE).pk, self.large.pk)
+        self.assertEqual(Grid.objects.get(solution=EASY_SOLUTION).pk, self.easy.pk)
+        self.assertFalse(Grid.objects.filter(grid=EASY_SOLUTION).exists())
+
+    def test_in_lookup(self):
+        found = Grid.objects.filter(grid__in=[EASY, SMALL.replace('.', '0'), EASY_SOLUTION])
+        self.assertEqual(set(found.values_list('pk', flat=True)), {self.easy.pk, self.small.pk})
+        self.assertEqual(Grid.objects.filter(solution__in=['', EASY_SOLUTION]).count(), 3)
+
+
+class PackGridsMigrationTests(TransactionTestCase):
+    before = [('game', '0004_grid_random_key')]
+    after = [('game', '0005_pack_grids')]
+
+    def migrate(self, targets):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes('game'))
+
+    def test_forward_and_backward(self):
+        Grid = self.migrate(self.before).get_model('game', 'Grid')
+        unsolved = Grid.objects.create(grid=EASY).pk
+        solved = Grid.objects.create(grid=EASY.replace('0', '.'), solution=EASY_SOLUTION).pk
+
+        Grid = self.migrate(self.after).get_model('game', 'Grid')
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT id, grid, solution FROM game_grid ORDER BY id')
+            rows = [(pk, bytes(grid), bytes(solution)) for pk, grid, solution in cursor.fetchall()]
+        self.assertEqual(rows, [(unsolved, pack(EASY), b''), (solved, pack(EASY), pack(EASY_SOLUTION))])
+        self.assertEqual(Grid.objects.get(pk=solved).solution, EASY_SOLUTION)
+
+        Grid = self.migrate(self.before).get_model('game', 'Grid')
+        rows = list(Grid.objects.order_by('id').values_list('id', 'grid', 'solution'))
+        self.assertEqual(rows, [(unsolved, EASY.replace('0', '.'), ''),
+                                (solved, EASY.replace('0', '.'), EASY_SOLUTION)])
+
+
+class CachedPlanTestCase(TestCase):
+    # Rows rolled back between tests send no post_delete, so their cached check plans would
+    # outlive them and answer for a reused pk
+    def setUp(self):
+        get_plan_cache().local.clear()
+        cache.clear()
+
+
+class LiveCheckTests(CachedPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.easy = Grid.objects.create(grid=EASY, solution=EASY_SOLUTION)
+
+    def post(self, url, body):
+        response = self.client.post(url, json.dumps(body), content_type='application/json')
+        return response.status_code, response.json()
+
+    def test_grid_delta(self):
+        url = '/validate/grid/delta/'
+        status, first = self.post(url, {'cells': {'A1': '5', 'A2': '5', 'B1': '3'}})
+        self.assertEqual(status, 200)
+        self.assertEqual(first['conflicts'], {'A1': True, 'A2': True, 'B1': False})
+        self.assertEqual((first['version'], first['conflict_count'], first['filled_count']), (1, 2, 3))
+        self.assertFalse(first['is_valid'])
+
+        # Only the changed cell and the peers sharing its old or new digit come back
+        status, second = self.post(url, {'cells': {'A2': ''}, 'token': first['token'], 'version': 1})
+        self.assertEqual(status, 200)
+        self.assertEqual(second['conflicts'], {'A1': False, 'A2': False})
+        self.assertEqual((second['version'], second['conflict_count'], second['filled_count']), (2, 0, 2))
+        self.assertTrue(second['is_valid'])
+
+        status, third = self.post(url, {'cells': {'C3': '3'}, 'token': second['token'], 'version': 2})
+        self.assertEqual(third['conflicts'], {'B1': True, 'C3': True})
+
+    def test_grid_delta_resync(self):
+        url = '/validate/grid/delta/'
+        _, first = self.post(url, {'cells': {'A1': '5'}})
+        _, second = self.post(url, {'cells': {'A2': '6'}, 'token': first['token'], 'version': 1})
+        status, stale = self.post(url, {'cells': {'A3': '7'}, 'token': first['token'], 'version': 2})
+        self.assertEqual(status, 409)
+        self.assertTrue(stale['resync'])
+        status, _ = self.post(url, {'cells': {'A3': '7'}, 'token': second['token'] + 'x', 'version': 2})
+        self.assertEqual(status, 409)
+        status, _ = self.post(url, {'cells': {'J1': '7'}, 'token': second['token'], 'version': 2})
+        self.assertEqual(status, 400)
+        status, _ = self.post(url, {'cells': {'A3': 'X'}, 'token': second['token'], 'version': 2})
+        self.assertEqual(status, 400)
+
+    def test_solution_delta(self):
+        url = f'/validate/solution/{self.easy.pk}/delta/'
+        # A3 is a given: it is ignored rather than marked
+        status, first = self.post(url, {'cells': {'A1': '4', 'A2': '1', 'A3': '9'}})
+        self.assertEqual(status, 200)
+        self.assertEqual(first['cells'], {'A1': 'correct', 'A2': 'wrong'})
+        self.assertEqual((first['version'], first['wrong_count']), (1, 1))
+        self.assertEqual(first['filled_count'], 81 - EASY.count('0') + 2)
+        self.assertIn('A3', first['initial_cells'])
+        self.assertFalse(first['is_complete'])
+
+        status, second = self.post(url, {'cells': {'A2': '8'}, 'token': first['token'], 'version': 1})
+        self.assertEqual(second['cells'], {'A2': 'correct'})
+        self.assertEqual((second['version'], second['wrong_count']), (2, 0))
+        self.assertNotIn('initial_cells', second)
+
+        rest = dict((s, EASY_SOLUTION[i]) for i, s in enumerate(geometry(9).squares) if EASY[i] == '0')
+        status, done = self.post(url, {'cells': rest, 'token': second['token'], 'version': 2})
+        self.assertEqual(done['wrong_count'], 0)
+        self.assertTrue(done['is_complete'])
+
+    def test_solution_delta_resync(self):
+        url = f'/validate/solution/{self.easy.pk}/delta/'
+        _, first = self.post(url, {'cells': {'A1': '4'}})
+        # Tokens are signed per puzzle
+        other = Grid.objects.create(grid=EASY_SOLUTION[:80] + '.', solution=EASY_SOLUTION)
+        status, _ = self.post(f'/validate/solution/{other.pk}/delta/',
+                              {'cells': {}, 'token': first['token'], 'version': 1})
+        self.assertEqual(status, 409)
+        status, _ = self.post(url, {'cells': {}, 'token': first['token'], 'version': 0})
+        self.assertEqual(status, 409)
+        self.assertEqual(self.client.post(f'/validate/solution/{other.pk + 1}/delta/', '{}',
+                                          content_type='application/json').status_code, 404)
+
+
+class AsyncViewTests(CachedPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.easy = Grid.objects.create(grid=EASY, solution=EASY_SOLUTION, solved_at=timezone.now())
+
+    def post(self, url, body):
+        return self.client.post(url, json.dumps(body), content_type='application/json')
+
+    def test_same_answers_as_sync(self):
+        body = {'user_input': {'A1': '4', 'A2': '1'}}
+        sync = self.post(f'/validate/solution/{self.easy.pk}/', body)
+        async_ = self.post(f'/validate/solution/{self.easy.pk}/async/', body)
+        self.assertEqual(async_.status_code, 200)
+        self.assertEqual(async_.json(), sync.json())
+
+        body = {'grid_input': {'A1': '4', 'A2': '1', 'Z9': '1'}, 'reveal': True}
+        sync = self.post(f'/api/puzzles/{self.easy.pk}/solve/', body)
+        async_ = self.post(f'/api/puzzles/{self.easy.pk}/solve/async/', body)
+        self.assertEqual(async_.status_code, 200)
+        self.assertEqual(async_.json(), sync.json())
+        self.assertEqual(async_.json()['wrong_cells'], ['A2', 'Z9'])
+
+    def test_unknown_puzzle_is_404(self):
+        pk = self.easy.pk + 1
+        body = {'grid_input': {'A1': '4'}}
+        self.assertEqual(self.post(f'/api/puzzles/{pk}/solve/', body).status_code, 404)
+        self.assertEqual(self.post(f'/api/puzzles/{pk}/solve/async/', body).status_code, 404)
+        self.assertEqual(self.post(f'/validate/solution/{pk}/async/', {'user_input': {}}).status_code, 404)
+
+    def test_bad_input_is_400(self):
+        response = self.post(f'/api/puzzles/{self.easy.pk}/solve/async/', {'grid_input': {'A1': 4}})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'/api/puzzles/{self.easy.pk}/solve/async/', 'not json',
+                                    content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_unsolved_puzzle_is_solved_on_the_pool(self):
+        grid = Grid.objects.create(grid=EASY)
+        response = self.post(f'/validate/solution/{grid.pk}/async/', {'user_input': {'A1': '4'}})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['correct_cells'], ['A1'])
+
+    @override_settings(SUDOKU_ASYNC={'WORKERS': 1, 'MAX_PENDING': 0})
+    def test_busy_solver_is_503(self):
+        grid = Grid.objects.create(grid=EASY)
+        response = self.post(f'/api/puzzles/{grid.pk}/solve/async/', {'grid_input': {'A1': '4'}})
+        self.assertEqual(response.status_code, 503)
+        # A stored solution needs no solve
+        response = self.post(f'/api/puzzles/{self.easy.pk}/solve/async/', {'grid_input': {'A1': '4'}})
+        self.assertEqual(response.status_code, 200)
+
+
+class SolverCancelTests(TestCase):
+    def test_cancelled_search_stops(self):
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(SolveCancelled):
+            solve(HARD, cancel=cancel)
+
+    async def test_cancelled_request_cancels_the_solve(self):
+        started = threading.Event()
+        stopped = threading.Event()
+
+        def work(cancel):
+            started.set()
+            if cancel.wait(5):
+                stopped.set()
+
+        task = asyncio.ensure_future(run_solver(work))
+        await asyncio.to_thread(started.wait, 5)
+        task.cancel()
+        with self.assertRaises(asyncio.CancelledError):
+            await task
+        self.assertTrue(await asyncio.to_thread(stopped.wait, 5))
+
+
+class SizedBoardTests(CachedPlanTestCase):
+    def create(self, grid, size=None):
+        data = {'grid': grid} if size is None else {'grid': grid, 'size': size}
+        return self.client.post('/api/puzzles/', data, content_type='application/json')
+
+    def test_create_each_size(self):
+        large = open(Path(__file__).parent / 'puzzles' / 'size16.txt').readline().strip()
+        for grid, size in ((EASY, None), (SMALL_UNIQUE, 4), (large, 16)):
+            response = self.create(grid, size)
+            self.assertEqual(response.status_code, 201, response.content)
+            grid_obj = Grid.objects.get(pk=response.json()['id'])
+            self.assertEqual(grid_obj.size, size or 9)
+            self.assertEqual(len(grid_obj.solution), len(grid))
+
+    def test_symbols_outside_the_size(self):
+        # Letters are 16x16 symbols: a 400 for a 9x9 grid, not a 500 from the solver
+        response = self.create(EASY[:80] + 'A')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('grid', response.json())
+        self.assertEqual(self.create(SMALL_UNIQUE[:15] + '5', 4).status_code, 400)
+        self.assertEqual(self.create('Z' + LARGE[1:], 16).status_code, 400)
+
+    def test_bad_boards(self):
+        self.assertEqual(self.create(SMALL_UNIQUE, 9).status_code, 400)
+        self.assertEqual(self.create('11' + SMALL_UNIQUE[2:], 4).status_code, 400)
+        self.assertEqual(self.create(SMALL, 4).status_code, 400)
+
+    def test_check_views_on_4x4(self):
+        grid_obj = Grid.objects.create(size=4, grid=SMALL_UNIQUE)
+        grid_obj.get_solution()
+        cells = dict(zip(geometry(4).squares, grid_obj.solution))
+        headers = {'X-Requested-With': 'XMLHttpRequest'}
+        for url in (f'/check/{grid_obj.pk}/', f'/check/{grid_obj.pk}/async/'):
+            result = self.client.post(url, cells, headers=headers).json()
+            self.assertEqual(result['wrong_cells'], [])
+            self.assertTrue(result['is_complete'])
+
+            wrong = dict(cells, D4='1' if cells['D4'] != '1' else '2')
+            result = self.client.post(url, wrong, headers=headers).json()
+            self.assertEqual(result['wrong_cells'], ['D4'])
+            self.assertFalse(result['is_complete'])
+
+        response = self.client.post(f'/validate/solution/{grid_obj.pk}/', json.dumps({'user_input': cells}),
+                                    content_type='application/json')
+        self.assertTrue(response.json()['is_complete'])
+
+
+class HintTests(CachedPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.easy = Grid.objects.create(grid=EASY, solution=EASY_SOLUTION, solved_at=timezone.now())
+        cls.hard = Grid.objects.create(grid=HARD)
+        cls.hard.get_solution()
+
+    def hint(self, grid_obj, cells):
+        return self.client.post(f'/api/puzzles/{grid_obj.pk}/hint/', {'grid_input': cells},
+                                content_type='application/json')
+
+    def test_hints_fill_the_board(self):
+        squares = geometry(9).squares
+        for grid_obj in (self.easy, self.hard):
+            cells = {}
+            for _ in range(81):
+                response = self.hint(grid_obj, cells)
+                self.assertEqual(response.status_code, 200)
+                hint = response.json()['hint']
+                if hint is None:
+                    break
+                i = squares.index(hint['cell'])
+                self.assertIn(grid_obj.grid[i], '0.')
+                self.assertNotIn(hint['cell'], cells)
+                self.assertEqual(hint['value'], grid_obj.solution[i])
+                self.assertIn(hint['steps'][-1], ('naked single', 'hidden single', 'guess'))
+                cells[hint['cell']] = hint['value']
+            self.assertEqual(response.json()['message'], 'The board is already complete')
+            self.assertEqual(len(cells), sum(c in '0.' for c in grid_obj.grid))
+
+    def test_wrong_cells_first(self):
+        result = self.hint(self.easy, {'A1': '4', 'A2': '1', 'A3': '3'}).json()
+        self.assertIsNone(result['hint'])
+        self.assertEqual(result['wrong_cells'], ['A2'])
+
+    def test_bad_requests(self):
+        self.assertEqual(self.hint(self.easy, {'A1': 4}).status_code, 400)
+        self.assertEqual(self.hint(self.easy, {'A1': '45'}).status_code, 400)
+        self.assertEqual(self.hint(self.easy, ['A1']).status_code, 400)
+        small = Grid.objects.create(size=4, grid=SMALL_UNIQUE)
+        self.assertEqual(self.hint(small, {}).status_code, 400)
+        self.assertEqual(self.client.post(f'/api/puzzles/{self.hard.pk + 100}/hint/', {},
+                                          content_type='application/json').status_code, 404)
+
+    def test_valid_entries(self):
+        self.assertTrue(valid_entries({'A1': '4', 'A2': '', 'A3': '.'}))
+        self.assertFalse(valid_entries({'A1': 4}))
+        self.assertFalse(valid_entries({'A1': None}))
+        self.assertFalse(valid_entries({'A1': ['4']}))
+        self.assertFalse(valid_entries({'A1': '44'}))
+
+
+class CheckPlanTests(CachedPlanTestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.easy = Grid.objects.create(grid=EASY, solution=EASY_SOLUTION, solved_at=timezone.now())
+
+    def test_compile(self):
+        plan = compile_plan(EASY, EASY_SOLUTION)
+        self.assertEqual(plan.givens, bytes(c != '0' for c in EASY))
+        self.assertEqual(len(plan.initial_cells), 81 - EASY.count('0'))
+        self.assertEqual(plan.initial_cells[:3], ('A3', 'A5', 'A7'))
+        small = compile_plan(SMALL_UNIQUE, '', 4)
+        self.assertEqual(small.initial_cells, ('A1', 'B1', 'B3', 'D4'))
+
+    def test_check(self):
+        plan = compile_plan(EASY, EASY_SOLUTION)
+        cells = {'A1': '4', 'A2': '1', 'A3': '3', 'A4': '', 'B2': '.', 'J1': '1'}
+        self.assertEqual(check(plan, cells), (4, [1, 10], [0, 2], ['J1']))
+        self.assertEqual(check(plan, cells, skip_givens=True, empty='.'), (3, [1], [0], ['J1']))
+        plan = compile_plan(SMALL_UNIQUE, '2341' * 4, 4)
+        self.assertEqual(check(plan, {'A1': '2', 'A2': '1', 'E1': '1'}), (2, [1], [0], ['E1']))
+
+    def test_cached_per_puzzle(self):
+        plan = check_plan(self.easy.pk)
+        self.assertEqual(plan.solution, EASY_SOLUTION)
+        with self.assertNumQueries(0):
+            self.assertIs(check_plan(self.easy.pk), plan)
+        # Another worker finds the plan in the Django cache
+        get_plan_cache().local.clear()
+        with self.assertNumQueries(0):
+            self.assertEqual(check_plan(self.easy.pk), plan)
+
+    def test_forgotten_on_save_and_delete(self):
+        grid_obj = Grid.objects.create(grid=EASY, solution=EASY_SOLUTION, solved_at=timezone.now())
+        check_plan(grid_obj.pk)
+        grid_obj.solution = EASY_SOLUTION[:80] + '1'
+        grid_obj.save()
+        self.assertIsNone(cache.get(plan_key(grid_obj.pk)))
+        self.assertEqual(check_plan(grid_obj.pk).solution[80], '1')
+        pk = grid_obj.pk
+        grid_obj.delete()
+        self.assertIsNone(get_plan_cache().get(pk))
+
+    async def test_async_cache(self):
+        plans = PlanCache(max_entries=2)
+        plan = compile_plan(EASY, EASY_SOLUTION)
+        self.assertIs(await plans.aset('test', plan), plan)
+        self.assertIs(await plans.aget('test'), plan)
+        plans.local.clear()
+        self.assertEqual(await plans.aget('test'), plan)
+        plans.forget('test')
+        self.assertIsNone(await plans.aget('test'))
+
+
+class LRUCacheTests(TestCase):
+    def test_evicts_least_recently_used(self):
+        lru = LRUCache(2)
+        lru.set('a', 1)
+        lru.set('b', 2)
+        self.assertEqual(lru.get('a'), 1)
+        lru.set('c', 3)
+        self.assertIsNone(lru.get('b'))
+        self.assertEqual((lru.get('a'), lru.get('c')), (1, 3))
+        stats = lru.stats()
+        self.assertEqual((stats['size'], stats['hits'], stats['misses'], stats['evictions']), (2, 3, 1, 1))
+        lru.discard('a')
+        lru.discard('a')
+        self.assertIsNone(lru.get('a'))
+
+    def test_ttl(self):
+        lru = LRUCache(2, ttl=10)
+        with mock.patch('game.lru.time.monotonic', return_value=100):
+            lru.set('a', 1)
+        with mock.patch('game.lru.time.monotonic', return_value=105):
+            self.assertEqual(lru.get('a'), 1)
+        with mock.patch('game.lru.time.monotonic', return_value=111):
+            self.assertIsNone(lru.get('a'))
+        self.assertEqual(lru.stats()['expirations'], 1)
+        lru.set('b', 2)
+        lru.clear()
+        self.assertEqual(lru.stats()['size'], 0)
+
+
+def shuffled(grid, rng):
+    # The same puzzle under a random symmetry: transposition, band, row, stack and column
+    # swaps and a relabelling of the digits
+    def lines(rng):
+        bands = rng.sample(range(3), 3)
+        return [3 * b + r for b in bands for r in rng.sample(range(3), 3)]
+    rows, cols = lines(rng), lines(rng)
+    labels = dict(zip('123456789', rng.sample('123456789', 9)))
+    cells = [grid[r * 9 + c] for r in rows for c in cols]
+    if rng.random() < 0.5:
+        cells = [cells[c * 9 + r] for r in range(9) for c in range(9)]
+    return ''.join(labels.get(c, '.') for c in cells)
+
+
+class CanonicalKeyTests(TestCase):
+    def test_same_key_under_symmetry(self):
+        rng = random.Random(3)
+        for grid in (EASY, HARD):
+            key = canonical_form(grid).key
+            self.assertEqual(len(key), 81)
+            for _ in range(20):
+                self.assertEqual(canonical_form(shuffled(grid, rng)).key, key)
+        self.assertNotEqual(canonical_form(EASY).key, canonical_form(HARD).key)
+
+    def test_round_trip(self):
+        grid = shuffled(EASY, random.Random(5))
+        form = canonical_form(grid)
+        self.assertEqual(form.from_canonical(form.key), grid)
+        self.assertEqual(form.to_canonical(grid), form.key)
+        solution = form.to_canonical(shuffled(EASY_SOLUTION, random.Random(5)))
+        self.assertEqual(form.from_canonical(solution), shuffled(EASY_SOLUTION, random.Random(5)))
+
+    def test_equivalent_puzzle_copies_the_solution(self):
+        Grid.objects.create(grid=EASY, solution=EASY_SOLUTION, solved_at=timezone.now(),
+                            canonical_key=canonical_form(EASY).key, grade=3, technique='hidden single')
+        rng = random.Random(7)
+        grid, solution = shuffled(EASY, rng), shuffled(EASY_SOLUTION, random.Random(7))
+        copy = Grid(grid=grid)
+        with mock.patch('game.models.cached_solve') as solver:
+            self.assertTrue(copy.copy_equivalent())
+        solver.assert_not_called()
+        self.assertEqual(copy.solution, solution)
+        self.assertEqual((copy.grade, copy.technique), (3, 'hidden single'))
+        self.assertFalse(Grid(grid=HARD).copy_equivalent())
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+# Trail solver engine: the bitmask representation, but one board for the whole search.
+# Every change to a cell is pushed on a trail as (cell, old mask) and backtracking pops the
+# trail back to the mark taken before the branch, so no state is copied. Propagation and
+# search are loops over explicit stacks, with no recursion however deep the search goes.
+from functools import partial
+
+from .bitmask import ALL, ALL_UNITS, COUNT, PEERS, SOLO, UNIT_BITS, UNIT_GETTERS, parse_grid, to_values
+from .utile import SolveCancelled
+
+
+def propagate(cells, trail, queue, dirty=ALL_UNITS):
+    # bitmask.propagate, logging each change on the trail
+    peers, count, solo, unit_bits, getters = PEERS, COUNT, SOLO, UNIT_BITS, UNIT_GETTERS
+    push = trail.append
+    while True:
+        while queue:
+            i = queue.pop()
+            m = cells[i]
+            dirty |= unit_bits[i]
+            for p in peers[i]:
+                pm = cells[p]
+                if pm & m:
+                    push(p)
+                    push(pm)
+                    pm ^= m
+                    cells[p] = pm
+                    if not pm:
+                        return False
+                    if count[pm] == 1:
+                        queue.append(p)
+
+        while dirty:
+            low = dirty & -dirty
+            dirty ^= low
+            unit, getter = getters[low.bit_length() - 1]
+            a, b, c, d, e, f, g, h, k = getter(cells)
+            twice = a & b
+            once = a | b
+            twice |= once & c
+            once |= c
+            twice |= once & d
+            once |= d
+            twice |= once & e
+            once |= e
+            twice |= once & f
+            once |= f
+            twice |= once & g
+            once |= g
+            twice |= once & h
+            once |= h
+            twice |= once & k
+            once |= k
+            if once != ALL:
+                return False
+            single = once & ~twice & ~(
+                solo[a] | solo[b] | solo[c] | solo[d] | solo[e] | solo[f] | solo[g] | solo[h] | solo[k])
+            if single:
+                for i in unit:
+                    m = cells[i] & single
+                    if m:
+                        if count[m] > 1:
+                            return False
+                        push(i)
+                        push(cells[i])
+                        cells[i] = m
+                        dirty |= unit_bits[i]
+                        queue.append(i)
+        if not queue:
+            return True
+
+
+def undo(cells, trail, mark):
+    while len(trail) > mark:
+        old = trail.pop()
+        cells[trail.pop()] = old
+
+
+def pick_mrv(cells):
+    # First open cell with the fewest candidates, -1 when the board is full
+    count = COUNT
+    best, fewest = -1, 10
+    i = 0
+    for m in cells:
+        n = count[m]
+        if 1 < n < fewest:
+            if n == 2:
+                return i
+            best, fewest = i, n
+        i += 1
+    return best
+
+
+def pick_degree(cells):
+    # Fewest candidates, ties broken by the most open peers (the most constraining cell)
+    first = pick_mrv(cells)
+    if first < 0:
+        return -1
+    count, peers = COUNT, PEERS
+    fewest = count[cells[first]]
+    best, degree = -1, -1
+    for i in range(first, 81):
+        if count[cells[i]] == fewest:
+            d = 0
+            for p in peers[i]:
+                if count[cells[p]] > 1:
+                    d += 1
+            if d > degree:
+                best, degree = i, d
+    return best
+
+
+HEURISTICS = {
+    'mrv': pick_mrv,
+    'degree': pick_degree,
+}
+
+
+def changes(cells, trail, mark):
+    # (eliminated candidates, newly fixed cells) since mark, from the first old mask per cell
+    first = {}
+    for k in range(mark, len(trail), 2):
+        first.setdefault(trail[k], trail[k + 1])
+    eliminated = sum(COUNT[old] - COUNT[cells[i]] for i, old in first.items())
+    fixed = sum(1 for i, old in first.items() if COUNT[old] > 1 and COUNT[cells[i]] == 1)
+    return eliminated, fixed
+
+
+def search(cells, pick=pick_mrv, limit=1, stats=None, cancel=None):
+    """Yield each solution (as a cell list copy) until limit solutions have been found.
+
+    The branch stack holds, per level, the cell branched on, the candidates still to try
+    and the trail mark to undo to before the next one.
+    """
+    trail = []
+    queue = []
+    branch_cells = []
+    branch_rest = []
+    branch_marks = []
+    found = 0
+    while True:
+        if cancel is not None and cancel.is_set():
+            raise SolveCancelled
+        best = pick(cells)
+        if best < 0:
+            yield cells[:]
+            found += 1
+            if found >= limit:
+                return
+        else:
+            branch_cells.append(best)
+            branch_rest.append(cells[best])
+            branch_marks.append(len(trail))
+
+        # Next untried branch, backtracking as far as needed
+        while branch_cells:
+            i = branch_cells[-1]
+            rest = branch_rest[-1]
+            mark = branch_marks[-1]
+            undo(cells, trail, mark)
+            if not rest:
+                branch_cells.pop()
+                branch_rest.pop()
+                branch_marks.pop()
+                continue
+            bit = rest & -rest
+            branch_rest[-1] = rest ^ bit
+            trail.append(i)
+            trail.append(cells[i])
+            cells[i] = bit
+            queue.clear()
+            queue.append(i)
+            ok = propagate(cells, trail, queue, UNIT_BITS[i])
+            if stats is not None:
+                stats.node(len(branch_cells), *changes(cells, trail, mark), failed=not ok)
+            if ok:
+                break
+        else:
+            return
+
+
+def solve(grid, stats=None, cancel=None, heuristic='mrv'):
+    cells = parse_grid(grid)
+    if not cells:
+        return False
+    if stats is not None:
+        stats.node(0, sum(9 - COUNT[m] for m in cells), sum(1 for m in cells if COUNT[m] == 1))
+    for solution in search(cells, HEURISTICS[heuristic], 1, stats, cancel):
+        return to_values(solution)
+    return False
+
+
+def count_solutions(grid, limit=2, heuristic='mrv'):
+    cells = parse_grid(grid)
+    if not cells:
+        return 0
+    return sum(1 for _ in search(cells, HEURISTICS[heuristic], limit))
+
+
+solve_degree = partial(solve, heuristic='degree')
+count_degree = partial(count_solutions, heuristic='degree')
@@ -1,6 +1,6 @@
 from django.urls import path
 from . import views
-from .views import SudokuListCreateAPI, SudokuSolveAPI
+from .views import SudokuListCreateAPI, MyPuzzlesAPI, SudokuDetailAPI, SudokuSolutionAPI, SudokuSolveAPI, SudokuHintAPI, SudokuBatchSolveAPI, SudokuExportAPI, SolverCacheStatsAPI
 
 urlpatterns = [
     path('', views.start, name='start'),
@@ -13,9 +13,21 @@ urlpatterns = [
     path('solve/<int:id>/', views.to_solve, name='to_solve'),
     path('solved/<int:id>/', views.solved, name='solved'),
     path('check/<int:id>/', views.check_solution, name='check_solution'),
+    path('check/<int:id>/async/', views.check_solution_async, name='check_solution_async'),
     path('clear/', views.clear_grids, name='clear_grids'),
     path('validate/grid/', views.validate_grid_input, name='validate_grid'),
     path('validate/solution/<int:id>/', views.validate_solution_progress, name='validate_solution'),
+    path('validate/grid/delta/', views.validate_grid_delta, name='validate_grid_delta'),
+    path('validate/solution/<int:id>/delta/', views.validate_solution_delta, name='validate_solution_delta'),
+    path('validate/solution/<int:id>/async/', views.validate_solution_progress_async, name='validate_solution_async'),
     path('api/puzzles/', SudokuListCreateAPI.as_view(), name='api_puzzles'),
+    path('api/puzzles/mine/', MyPuzzlesAPI.as_view(), name='api_my_puzzles'),
+    path('api/puzzles/<int:pk>/', SudokuDetailAPI.as_view(), name='api_puzzle'),
+    path('api/puzzles/<int:pk>/solution/', SudokuSolutionAPI.as_view(), name='api_solution'),
     path('api/puzzles/<int:pk>/solve/', SudokuSolveAPI.as_view(), name='api_solve'),
+    path('api/puzzles/<int:pk>/hint/', SudokuHintAPI.as_view(), name='api_hint'),
+    path('api/puzzles/<int:pk>/solve/async/', views.solve_api_async, name='api_solve_async'),
+    path('api/puzzles/export/', SudokuExportAPI.as_view(), name='api_export'),
+    path('api/puzzles/solve-batch/', SudokuBatchSolveAPI.as_view(), name='api_solve_batch'),
+    path('api/solver/cache-stats/', SolverCacheStatsAPI.as_view(), name='api_solver_cache_stats'),
 ]
\ No newline at end of file
@@ -1,3 +1,7 @@
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+
 def cross(A, B):
     return [a + b for a in A for b in B]
 
@@ -7,6 +11,24 @@ def grid_values(grid):
     return dict(zip(squares, chars))
 
 
+def setting(name, default=None):
+    # The solver also runs outside a configured project (scripts, worker processes)
+    try:
+        return getattr(settings, name, default)
+    except ImproperlyConfigured:
+        return default
+
+
+def option(name, key, default=None):
+    # One entry of a dict setting such as SUDOKU_BATCH = {'MAX_GRIDS': 100}
+    return setting(name, {}).get(key, default)
+
+
+class SolveCancelled(Exception):
+    # Raised from inside a search when its cancel event is set
+    pass
+
+
 def removeDot(dict):
     # Rimuove i punti
     for el in dict:
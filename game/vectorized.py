@@ -0,0 +1,151 @@
+# -*- coding: utf-8 -*-
+# NumPy batch checks for corpus QA: N grids live in one (N, 81) uint8 array and every
+# unit/peer lookup is a fancy-index over the tables below, built from sudoku.unitlist.
+# Only grids that singles propagation can't finish go through the per-grid search.
+import numpy as np
+
+from . import bitmask
+from .sudoku import unitlist, squares
+
+_index = dict((s, i) for i, s in enumerate(squares))
+
+UNITS = np.array([[_index[s] for s in u] for u in unitlist], dtype=np.intp)
+PEERS = np.array([sorted(set(i for u in UNITS if c in u for i in u) - {c}) for c in range(81)], dtype=np.intp)
+# (unit, position) of each cell's three units, for scattering per-unit results back to cells
+CELL_SLOTS = np.array([[(u, list(UNITS[u]).index(c)) for u in range(len(UNITS)) if c in UNITS[u]]
+                       for c in range(81)], dtype=np.intp)
+
+ALL = (1 << 9) - 1
+POPCOUNT = np.array([bin(m).count('1') for m in range(ALL + 1)], dtype=np.uint8)
+DIGIT_OF = np.array([m.bit_length() if POPCOUNT[m] == 1 else 0 for m in range(ALL + 1)], dtype=np.uint8)
+
+# '1'..'9' -> 1..9, everything else (., 0) -> 0
+_decode = np.zeros(256, dtype=np.uint8)
+_decode[np.frombuffer(b'123456789', dtype=np.uint8)] = np.arange(1, 10, dtype=np.uint8)
+
+
+def load_grids(grids):
+    # grids: iterable of normalized 81-char strings
+    grids = list(grids)
+    raw = np.frombuffer(''.join(grids).encode('ascii'), dtype=np.uint8)
+    return _decode[raw].reshape(len(grids), 81)
+
+
+def load_packed(rows):
+    # rows: 9x9 grids as stored by fields.PackedGridField, 41 bytes of two cells each
+    raw = np.frombuffer(b''.join(rows), dtype=np.uint8).reshape(len(rows), 41)
+    boards = np.empty((len(rows), 82), dtype=np.uint8)
+    boards[:, 0::2] = raw >> 4
+    boards[:, 1::2] = raw & 15
+    return boards[:, :81]
+
+
+def to_bits(boards):
+    return np.where(boards > 0, np.left_shift(1, boards.astype(np.uint16) - 1), 0).astype(np.uint16)
+
+
+def has_duplicates(boards):
+    # A unit repeats a digit exactly when the sum of its digit bits differs from their OR
+    units = to_bits(boards)[:, UNITS]
+    return (units.sum(axis=2, dtype=np.uint32) != np.bitwise_or.reduce(units, axis=2)).any(axis=1)
+
+
+def propagate(boards):
+    """Naked and hidden singles over the whole batch until nothing changes.
+
+    Returns (cands, ok): per-cell candidate masks and a flag for grids that hit no
+    contradiction. A grid is solved when ok and every mask has a single bit.
+    """
+    n = len(boards)
+    given = to_bits(boards)
+    cands = np.where(given > 0, given, ALL).astype(np.uint16)
+    ok = ~has_duplicates(boards)
+    while True:
+        before = cands.copy()
+
+        placed = np.where(POPCOUNT[cands] == 1, cands, 0)
+        taken = np.bitwise_or.reduce(placed[:, PEERS], axis=2)
+        cands = np.where(placed > 0, cands, cands & ~taken)
+
+        units = cands[:, UNITS]
+        once = np.zeros((n, len(UNITS)), dtype=np.uint16)
+        twice = np.zeros_like(once)
+        for k in range(9):
+            twice |= once & units[:, :, k]
+            once |= units[:, :, k]
+        ok &= (once == ALL).all(axis=1)
+
+        hidden = units & (once & ~twice)[:, :, None]
+        hidden = np.where(POPCOUNT[units] > 1, hidden, 0)
+        forced = np.bitwise_or.reduce(hidden[:, CELL_SLOTS[:, :, 0], CELL_SLOTS[:, :, 1]], axis=2)
+        ok &= ~(POPCOUNT[forced] > 1).any(axis=1)
+        cands = np.where(forced > 0, forced, cands)
+
+        ok &= (cands > 0).all(axis=1)
+        cands[~ok] = before[~ok]
+        if np.array_equal(cands, before):
+            return cands, ok
+
+
+def check_batch(grids):
+    # Returns (status, solution) per grid: 'malformed', 'duplicate digits', 'unsolvable',
+    # 'propagated' (finished by singles alone) or 'searched'
+    results = [None] * len(grids)
+    good = []
+    for k, grid in enumerate(grids):
+        if len(grid) == 81 and all(c in '.0123456789' for c in grid):
+            good.append(k)
+        else:
+            results[k] = ('malformed', None)
+    if not good:
+        return results
+
+    for k, result in zip(good, check_boards(load_grids(grids[k] for k in good))):
+        results[k] = result
+    return results
+
+
+def check_packed(rows):
+    # check_batch for packed rows read straight from the grid column, skipping the text form
+    results = [None] * len(rows)
+    good = []
+    for k, data in enumerate(rows):
+        if len(data) == 41:
+            good.append(k)
+        else:
+            results[k] = ('malformed', None)
+    if not good:
+        return results
+
+    boards = load_packed([rows[k] for k in good])
+    # Nibbles above 9 are not cells of a 9x9 grid
+    fine = (boards <= 9).all(axis=1)
+    for k, result in zip(np.compress(fine, good), check_boards(boards[fine])):
+        results[k] = result
+    for k in np.compress(~fine, good):
+        results[k] = ('malformed', None)
+    return results
+
+
+def check_boards(boards):
+    # check_batch on an (N, 81) digit array of well-formed grids
+    results = []
+    duplicates = has_duplicates(boards)
+    cands, ok = propagate(boards)
+    solved = ok & (POPCOUNT[cands] == 1).all(axis=1)
+    digits = (DIGIT_OF[cands] + ord('0')).astype(np.uint8)
+
+    for row in range(len(boards)):
+        if duplicates[row]:
+            results.append(('duplicate digits', None))
+        elif not ok[row]:
+            results.append(('unsolvable', None))
+        elif solved[row]:
+            results.append(('propagated', digits[row].tobytes().decode('ascii')))
+        else:
+            cells = bitmask.search(cands[row].tolist())
+            if cells:
+                results.append(('searched', ''.join(bitmask.DIGIT[m] for m in cells)))
+            else:
+                results.append(('unsolvable', None))
+    return results
@@ -1,17 +1,34 @@
 import json
+import time
+from concurrent.futures.process import BrokenProcessPool
 
+from asgiref.sync import sync_to_async
+from django.conf import settings
 from django.contrib import messages
 from django.contrib.auth import authenticate
 from django.contrib.auth.decorators import login_required
 from django.contrib.auth.models import User
-from django.http import JsonResponse
-from django.shortcuts import render, redirect, get_object_or_404
+from django.db.models import Q
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth import authenticate, login as auth_login, logout as auth_logout
-from .models import Grid
+from . import export, live
+from .http_cache import cached_resource, conditional_response, make_resource
+from .async_solver import run_solver, SolverBusy
+from .batch import solve_batch
+from .check_plan import check, compile_plan, get_plan_cache, solution_values, square_names
+from .grader import grade
+from .hints import next_hint, wrong_entries
+from .models import Grid, generator_setting
+from .pagination import keyset_page, decode_cursor, PuzzleCursorPagination
 from .forms import SudokuForm, LevelForm
-from .sudoku import solve, is_valid_input
-from random import choice
+from .generator import generate
+from .solution_cache import cached_solve, get_solution_cache
+from .sudoku import solve, is_valid_input, count_solutions, SolveStats, SOLVER_VERSION
 
 
 @require_http_methods(["POST"])
@@ -30,7 +47,7 @@ def validate_grid_input(request):
                 value = grid_data.get(key, '.')
                 grid_dict[key] = value if value else '.'
 
-        duplicates = []
+        duplicates = set()
         filled_count = 0
 
         for row in rows: 
@@ -41,8 +58,8 @@ def validate_grid_input(request):
                 if value != '.': 
                     filled_count += 1
                     if value in seen: 
-                        duplicates.append(key)
-                        duplicates.append(seen[value])
+                        duplicates.add(key)
+                        duplicates.add(seen[value])
                     else: 
                         seen[value] = key
 
@@ -53,10 +70,8 @@ def validate_grid_input(request):
                 value = grid_dict[key]
                 if value != '.': 
                     if value in seen: 
-                        if key not in duplicates: 
-                            duplicates.append(key)
-                        if seen[value] not in duplicates: 
-                            duplicates.append(seen[value])
+                        duplicates.add(key)
+                        duplicates.add(seen[value])
                     else: 
                         seen[value] = key
 
@@ -72,14 +87,12 @@ def validate_grid_input(request):
                         value = grid_dict[key]
                         if value != '.': 
                             if value in seen: 
-                                if key not in duplicates: 
-                                    duplicates.append(key)
-                                if seen[value] not in duplicates: 
-                                    duplicates.append(seen[value])
+                                duplicates.add(key)
+                                duplicates.add(seen[value])
                             else: 
                                 seen[value] = key
 
-        duplicates = list(set(duplicates))
+        duplicates = list(duplicates)
 
         is_valid = len(duplicates) == 0
         has_minimum = filled_count >= 17
@@ -99,52 +112,108 @@ def validate_grid_input(request):
 @require_http_methods(["POST"])
 def validate_solution_progress(request, id): 
     try: 
-        grid_obj = get_object_or_404(Grid, pk=id)
-        solution = solve(grid_obj.grid)
+        plan = check_plan(id)
 
-        if not solution: 
+        if not plan.solution: 
             return JsonResponse({'error': 'Cannot solve puzzle'}, status=400)
 
         data = json.loads(request.body)
         user_input = data.get('user_input', {})
+        if not valid_entries(user_input): 
+            return JsonResponse({'error': ENTRIES_ERROR}, status=400)
+        return JsonResponse(solution_progress(plan, user_input))
 
-        initial_cells = []
-        rows, cols = "ABCDEFGHI", "123456789"
-        for i, char in enumerate(grid_obj.grid): 
-            if char != '.': 
-                field_name = f"{rows[i // 9]}{cols[i % 9]}"
-                initial_cells.append(field_name)
+    except Exception as e: 
+        return JsonResponse({'error': str(e)}, status=400)
 
-        wrong_cells = []
-        correct_cells = []
-        filled_count = 0
 
-        for key in solution.keys(): 
-            user_val = user_input.get(key, '')
+def check_plan(pk): 
+    # Compiled givens and solution of a stored puzzle; a cached plan skips the database
+    plans = get_plan_cache()
+    plan = plans.get(pk)
+    if plan is None: 
+        grid_obj = get_object_or_404(Grid.objects.only('size', 'grid', 'solution', 'solved_at'), pk=pk)
+        grid_obj.get_solution()
+        plan = plans.set(pk, compile_plan(grid_obj.grid, grid_obj.solution, grid_obj.size))
+    return plan
 
-            if user_val: 
-                filled_count += 1
-                # Only validate user-entered cells (not initial cells)
-                if key not in initial_cells: 
-                    if user_val != solution[key]: 
-                        wrong_cells.append(key)
-                    else: 
-                        correct_cells.append(key)
 
-        is_complete = filled_count == 81 and len(wrong_cells) == 0
+def solution_progress(plan, user_input): 
+    # Only validate user-entered cells (not initial cells)
+    filled_count, wrong, correct, _ = check(plan, user_input, skip_givens=True)
+    wrong_cells = square_names(plan, wrong)
+    is_complete = filled_count == len(plan.grid) and len(wrong_cells) == 0
+
+    return {
+        'wrong_cells': wrong_cells,
+        'correct_cells': square_names(plan, correct),
+        'initial_cells': list(plan.initial_cells),
+        'filled_count': filled_count,
+        'is_complete': is_complete,
+        'message': get_progress_message(len(wrong_cells), is_complete)
+    }
 
-        return JsonResponse({
-            'wrong_cells': wrong_cells,
-            'correct_cells': correct_cells,
-            'initial_cells': initial_cells,
-            'filled_count': filled_count,
-            'is_complete': is_complete,
-            'message': get_progress_message(len(wrong_cells), is_complete)
-        })
 
+# Delta versions of the two checks above: the client sends {'cells': {changed}, 'token', 'version'}
+# (or every cell and no token to start over) and gets back only the cells whose state moved.
+# A 409 means the token didn't match and the client should resend the whole board.
+@require_http_methods(["POST"])
+def validate_grid_delta(request): 
+    try: 
+        data = json.loads(request.body)
+        salt = 'game.live.grid'
+        state = live.load(data['token'], data.get('version'), salt) if data.get('token') else None
+        state, conflicts = live.grid_delta(state, data.get('cells', {}))
+    except live.StaleBoard as e: 
+        return JsonResponse({'error': str(e), 'resync': True}, status=409)
     except Exception as e: 
         return JsonResponse({'error': str(e)}, status=400)
 
+    filled_count = 81 - state['b'].count('.')
+    is_valid = state['c'] == 0
+    return JsonResponse({
+        'token': live.dump(state, salt),
+        'version': state['v'],
+        'conflicts': conflicts,
+        'conflict_count': state['c'],
+        'is_valid': is_valid,
+        'filled_count': filled_count,
+        'has_minimum': filled_count >= 17,
+        'message': get_validation_message(is_valid, filled_count, state['c'])
+    })
+
+
+@require_http_methods(["POST"])
+def validate_solution_delta(request, id): 
+    plan = check_plan(id)
+    if not plan.solution: 
+        return JsonResponse({'error': 'Cannot solve puzzle'}, status=400)
+
+    try: 
+        data = json.loads(request.body)
+        salt = f'game.live.progress.{id}'
+        state = live.load(data['token'], data.get('version'), salt) if data.get('token') else None
+        state, marks = live.progress_delta(state, data.get('cells', {}), plan.grid, plan.solution)
+    except live.StaleBoard as e: 
+        return JsonResponse({'error': str(e), 'resync': True}, status=409)
+    except Exception as e: 
+        return JsonResponse({'error': str(e)}, status=400)
+
+    filled_count = len(state['b']) - state['b'].count('.')
+    is_complete = filled_count == len(state['b']) and state['w'] == 0
+    response = {
+        'token': live.dump(state, salt),
+        'version': state['v'],
+        'cells': marks,
+        'wrong_count': state['w'],
+        'filled_count': filled_count,
+        'is_complete': is_complete,
+        'message': get_progress_message(state['w'], is_complete)
+    }
+    if state['v'] == 1: 
+        response['initial_cells'] = list(plan.initial_cells)
+    return JsonResponse(response)
+
 
 def get_validation_message(is_valid, filled_count, duplicate_count): 
     if duplicate_count > 0: 
@@ -170,14 +239,17 @@ def start(request):
         level_form = LevelForm(request.POST)
         if level_form.is_valid():
             level = level_form.cleaned_data.get('level').lower()
-            queryset = Grid.objects.filter(difficulty=level, is_public=True)
+            random_grid = Grid.objects.random_public(level)
 
-            if queryset.exists():
-                random_grid = choice(queryset)
+            if random_grid:
                 return redirect('to_solve', id=random_grid.id)
-            else:
-                error = f'No {level} puzzles found in database.'
-                return render(request, 'start.html', {'level_form': level_form, 'error': error})
+            # Empty bucket: generate one now instead of waiting on a run_generator_worker
+            # that may not be running; a few full grids take well under a second
+            generated = generate(level, max_tries=generator_setting('INLINE_TRIES', 5))
+            if generated:
+                return redirect('to_solve', id=Grid.objects.create_generated(generated).id)
+            error = f'No {level} puzzles found in database and none could be generated just now, please try again.'
+            return render(request, 'start.html', {'level_form': level_form, 'error': error})
 
     level_form = LevelForm()
     return render(request, 'start.html', {'level_form': level_form})
@@ -187,7 +259,6 @@ def new(request):
         form = SudokuForm(request.POST)
         if form.is_valid(): 
             data = form.cleaned_data
-            selected_difficulty = data.get('difficulty')
 
             grid_dict = {f"{r}{c}": data.get(f"{r}{c}") or "." for r in "ABCDEFGHI" for c in "123456789"}
             grid_string = "".join(grid_dict.values())
@@ -196,18 +267,24 @@ def new(request):
                 messages.error(request, "Invalid Grid: Duplicate numbers found in a row, column, or block!")
                 return render(request, 'new.html', {'form': form})
 
-            solution = solve(grid_string)
-            if not solution: 
+            solutions = count_solutions(grid_string)
+            if not solutions: 
                 messages.error(request, "This puzzle has no possible solution!")
                 return render(request, 'new.html', {'form': form})
+            if solutions > 1: 
+                messages.error(request, "This puzzle has more than one solution! Add more clues.")
+                return render(request, 'new.html', {'form': form})
 
-            new_grid = Grid.objects.create(
+            new_grid = Grid(
                 grid=grid_string,
-                difficulty=selected_difficulty,
                 created_by=request.user if request.user.is_authenticated else None,
                 is_public=True
             )
-            messages.success(request, f"Puzzle created successfully! ID: {new_grid.id}")
+            if not new_grid.copy_equivalent(): 
+                new_grid.set_solution(cached_solve(grid_string))
+                new_grid.set_grade(grade(grid_string))
+            new_grid.save()
+            messages.success(request, f"Puzzle created successfully! ID: {new_grid.id} ({new_grid.difficulty})")
             return redirect('to_solve', id=new_grid.id)
     else: 
         form = SudokuForm()
@@ -216,56 +293,47 @@ def new(request):
 
 
 def to_solve(request, id):
-    grid_obj = get_object_or_404(Grid, pk=id)
-    initial_data = {}
-    rows, cols = "ABCDEFGHI", "123456789"
-    for i, char in enumerate(grid_obj.grid):
-        if char != '.' and char != '' :
-            field_name = f"{rows[i // 9]}{cols[i % 9]}"
-            initial_data[field_name] = char
-    form = SudokuForm(initial=initial_data)
+    # The board comes from the per-grid fragment cache (see rendering.py)
+    grid_obj = get_object_or_404(Grid.objects.only('id', 'size', 'grid', 'source', 'date'), pk=id)
 
     return render(request, 'solve.html', {
         'id': grid_obj.id,
-        'form': form,
+        'puzzle': grid_obj,
         'description': grid_obj
     })
 
 
 def check_solution(request, id):
-    grid_obj = get_object_or_404(Grid, pk=id)
-    solution = solve(grid_obj.grid)
+    plan = check_plan(id)
 
     wrong_cells = []
-    correct_cells = []
 
     if request.method == 'POST': 
-        for key in solution.keys(): 
-            user_val = request.POST.get(key)
-            if user_val: 
-                if user_val != solution[key]: 
-                    wrong_cells.append(key)
-                else: 
-                    correct_cells.append(key)
+        wrong_cells, correct_cells = check_cells(plan, request.POST)
 
         if request.headers.get('X-Requested-With') == 'XMLHttpRequest': 
             return JsonResponse({
                 'wrong_cells': wrong_cells,
                 'correct_cells': correct_cells,
-                'is_complete': len(wrong_cells) == 0 and len(correct_cells) == 81
+                'is_complete': len(wrong_cells) == 0 and len(correct_cells) == len(plan.grid)
             })
 
-    form = SudokuForm(request.POST)
+    grid_obj = get_object_or_404(Grid.objects.only('id', 'size', 'grid', 'source', 'date'), pk=id)
     return render(request, 'solve.html', {
         'id': id,
-        'form': form,
+        'puzzle': grid_obj,
+        'values': request.POST,
         'wrong_cells': wrong_cells,
         'description': grid_obj
     })
 
+def check_cells(plan, user_values): 
+    _, wrong, correct, _ = check(plan, user_values)
+    return square_names(plan, wrong), square_names(plan, correct)
+
 def solved(request, id):
     grid_obj = get_object_or_404(Grid, pk=id)
-    solved_grid = solve(grid_obj.grid)
+    solved_grid = grid_obj.get_solution()
 
     time_taken_seconds = request.POST.get('time_taken', '0') if request.method == 'POST' else '0'
     minutes = int(float(time_taken_seconds)) // 60
@@ -276,7 +344,8 @@ def solved(request, id):
         return render(request, 'solve.html', {'id': id, 'error': 'Unsolvable!'})
 
     return render(request, 'solved.html', {
-        'grid': solved_grid,
+        'puzzle': grid_obj,
+        'board': 'solution',
         'original': grid_obj,
         'time_spent': time_str
     })
@@ -307,9 +376,12 @@ def delete_puzzle(request, id) :
 
     return render(request, 'delete.html', {'puzzle' :grid_obj})
 
+@login_required
 def my_puzzles(request):
-    user_puzzles = Grid.objects.filter(created_by=request.user).order_by('-date')
-    return render(request, 'my_puzzles.html', {'puzzles': user_puzzles})
+    # Only the columns the table shows; pages are seeks on (created_by, date, id)
+    user_puzzles = Grid.objects.filter(created_by=request.user).only('id', 'difficulty', 'source', 'date', 'is_public')
+    page = keyset_page(user_puzzles, decode_cursor(request.GET.get('before')), decode_cursor(request.GET.get('after')))
+    return render(request, 'my_puzzles.html', {'puzzles': page.items, 'page': page})
 
 def login_view(request) :
     if request.method == 'POST' :
@@ -361,15 +433,16 @@ def register_view(request) :
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .serializers import GridSerializer
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from .serializers import GridSerializer, BatchSolveSerializer
 
 class SudokuListCreateAPI(APIView): 
     # GET: Get a random puzzle by difficulty (Replaces 'start' logic)
     def get(self, request): 
         level = request.query_params.get('level', 'easy').lower()
-        queryset = Grid.objects.filter(difficulty=level)
-        if queryset.exists(): 
-            grid = choice(queryset)
+        grid = Grid.objects.random_public(level)
+        if grid: 
             serializer = GridSerializer(grid)
             return Response(serializer.data)
         return Response({"error": "No puzzles found"}, status=status.HTTP_404_NOT_FOUND)
@@ -383,16 +456,290 @@ class SudokuListCreateAPI(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+class MyPuzzlesAPI(ListAPIView): 
+    # GET: the user's puzzles, newest first, cursor paginated (?cursor=..., ?page_size=)
+    serializer_class = GridSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = PuzzleCursorPagination
+
+    def get_queryset(self): 
+        return Grid.objects.filter(created_by=self.request.user).only(*GridSerializer.Meta.fields)
+
+
+class SudokuDetailAPI(APIView): 
+    # GET: one stored puzzle, conditional and cacheable (see http_cache.py)
+    def get(self, request, pk): 
+        return conditional_response(request, cached_resource(pk, 'puzzle', puzzle_resource), Response)
+
+
+class SudokuSolutionAPI(APIView): 
+    # GET: the solution of a stored puzzle, the cacheable counterpart of POST solve with reveal
+    def get(self, request, pk): 
+        return conditional_response(request, cached_resource(pk, 'solution', solution_resource), Response)
+
+
+def puzzle_resource(pk): 
+    grid_obj = get_object_or_404(Grid.objects.only(*GridSerializer.Meta.fields, 'is_public', 'updated_at'), pk=pk)
+    return make_resource(GridSerializer(grid_obj).data, grid_obj)
+
+
+def solution_resource(pk): 
+    grid_obj = get_object_or_404(Grid.objects.only('size', 'grid', 'solution', 'solved_at', 'is_public', 'updated_at'), pk=pk)
+    solution = grid_obj.get_solution()
+    return make_resource({'id': grid_obj.id, 'size': grid_obj.size, 'solution': solution or None}, grid_obj)
+
+
 class SudokuSolveAPI(APIView): 
     def post(self, request, pk): 
-        grid_obj = get_object_or_404(Grid, pk=pk)
-        solution = solve(grid_obj.grid)
         user_input = request.data.get('grid_input')
+        if not isinstance(user_input, dict) or not valid_entries(user_input): 
+            return Response({'error': f'grid_input must map squares to values. {ENTRIES_ERROR}'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        plan = check_plan(pk)
+        response = Response(solve_result(plan, user_input, request.data.get('reveal')))
+
+        # Debug: re-run the solver instrumented (the stored solution skips it)
+        if request.query_params.get('debug') and (settings.DEBUG or request.user.is_staff): 
+            stats = SolveStats()
+            solve(plan.grid, stats=stats)
+            response.data['solver_stats'] = stats.as_dict()
+            response['X-Solver-Stats'] = json.dumps(stats.as_dict())
+        return response
+
+
+class SudokuHintAPI(APIView): 
+    # POST {'grid_input': {square: digit}}: the next cell to fill and the technique behind it
+    def post(self, request, pk): 
+        plan = check_plan(pk)
+        if plan.size != 9: 
+            return Response({'error': 'Hints are only available for 9x9 puzzles'}, status=status.HTTP_400_BAD_REQUEST)
+        user_input = request.data.get('grid_input') or {}
+        if not isinstance(user_input, dict): 
+            return Response({'error': 'grid_input must map squares to digits'}, status=status.HTTP_400_BAD_REQUEST)
+        if not valid_entries(user_input): 
+            return Response({'error': ENTRIES_ERROR}, status=status.HTTP_400_BAD_REQUEST)
+        if not plan.solution: 
+            return Response({'error': 'Cannot solve puzzle'}, status=status.HTTP_400_BAD_REQUEST)
+
+        wrong_cells = wrong_entries(plan, user_input)
+        if wrong_cells: 
+            return Response({'hint': None, 'wrong_cells': wrong_cells, 'message': 'Fix the wrong cells first'})
+        hint = next_hint(plan.grid, plan.solution, user_input)
+        if hint is None: 
+            return Response({'hint': None, 'wrong_cells': [], 'message': 'The board is already complete'})
+        return Response({'hint': hint._asdict(), 'wrong_cells': [], 'message': f'{hint.cell}: try {hint.technique}'})
+
+
+ENTRIES_ERROR = "Cell values must be single characters ('', '.' or '0' for an empty cell)"
+
 
-        wrong_cells = [k for k, v in user_input.items() if v and v != solution.get(k)]
+def valid_entries(cells): 
+    # JSON lets a client send numbers or lists; the checkers compare one-character strings
+    return all(isinstance(v, str) and len(v) <= 1 for v in cells.values())
+
+
+def solve_result(plan, user_input, reveal): 
+    # Names that aren't squares count as wrong
+    _, wrong, _, unknown = check(plan, user_input)
+    wrong_cells = square_names(plan, wrong) + unknown
+
+    return {
+        "is_correct": len(wrong_cells) == 0 and "." not in user_input.values(),
+        "wrong_cells": wrong_cells,
+        "solution": solution_values(plan) if reveal else None
+    }
+
+
+class SudokuBatchSolveAPI(APIView): 
+    # POST: Solve many grids (or stored puzzles by id) in one request
+    def post(self, request): 
+        serializer = BatchSolveSerializer(data=request.data)
+        if not serializer.is_valid(): 
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        data = serializer.validated_data
+        start_time = time.perf_counter()
+
+        results = []
+        pending = []
+        if 'ids' in data: 
+            stored = Grid.objects.only('id', 'size', 'grid', 'solution', 'solved_at').in_bulk(data['ids'])
+            for pk in data['ids']: 
+                grid_obj = stored.get(pk)
+                if grid_obj is None: 
+                    results.append({'id': pk, 'status': 'not_found', 'solution': None, 'solve_time': None})
+                elif grid_obj.solved_at is not None: 
+                    results.append({
+                        'id': pk,
+                        'status': 'solved' if grid_obj.solution else 'unsolvable',
+                        'solution': grid_obj.solution or None,
+                        'solve_time': 0.0
+                    })
+                else: 
+                    results.append({'id': pk})
+                    pending.append((results[-1], grid_obj.grid, grid_obj))
+        else: 
+            for grid in data['grids']: 
+                results.append({'grid': grid})
+                pending.append((results[-1], grid, None))
+
+        if pending: 
+            try: 
+                solved = solve_batch([grid for _, grid, _ in pending], data['time_budget'])
+            except BrokenProcessPool: 
+                return Response({'error': 'Solver pool unavailable, retry'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            now = timezone.now()
+            finished = []
+            for (result, _, grid_obj), (state, solution, seconds) in zip(pending, solved): 
+                result.update({'status': state, 'solution': solution, 'solve_time': seconds})
+                # Stored puzzles keep the answer, as backfill_solutions does, so the next batch reads it back
+                if grid_obj is not None and state in ('solved', 'unsolvable'): 
+                    grid_obj.solution = solution or ''
+                    grid_obj.solved_at = grid_obj.updated_at = now
+                    grid_obj.solver_version = SOLVER_VERSION
+                    finished.append(grid_obj)
+            Grid.objects.bulk_update(finished, ['solution', 'solved_at', 'solver_version', 'updated_at'])
 
         return Response({
-            "is_correct": len(wrong_cells) == 0 and "." not in user_input.values(),
-            "wrong_cells": wrong_cells,
-            "solution": solution if request.data.get('reveal') else None
-        })
\ No newline at end of file
+            'results': results,
+            'elapsed': time.perf_counter() - start_time
+        })
+
+
+class SolverCacheStatsAPI(APIView):
+    # Counters are per worker process; the pid tells gunicorn workers apart
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_solution_cache().stats())
+
+
+class SudokuExportAPI(APIView):
+    # GET ?type=ndjson|csv&difficulty=&source=&date_from=&date_to=&owner=&solution=1
+    # Streams the rows; staff export everything, everyone else public puzzles and their own
+    def get(self, request):
+        params = request.query_params
+        # Not ?format=, which DRF keeps for picking a renderer
+        fmt = params.get('type', 'ndjson')
+        if fmt not in export.FORMATS:
+            return Response({'error': f"type must be one of {', '.join(export.FORMATS)}"},
+                            status=status.HTTP_400_BAD_REQUEST)
+        dates = {}
+        for name in ('date_from', 'date_to'):
+            if params.get(name):
+                dates[name] = parse_date(params[name])
+                if dates[name] is None:
+                    return Response({'error': f'{name} must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+
+        grids = Grid.objects.all()
+        if not request.user.is_staff:
+            visible = Q(is_public=True)
+            if request.user.is_authenticated:
+                visible |= Q(created_by=request.user)
+            grids = grids.filter(visible)
+        grids = export.export_queryset(params.get('difficulty'), params.get('source'), owner=params.get('owner'),
+                                       queryset=grids, **dates)
+        columns = export.columns_for(params.get('solution') in ('1', 'true'))
+        rows = export.export_rows(grids, columns)
+
+        response = StreamingHttpResponse(export.blocks(export.export_lines(fmt, columns, rows)),
+                                         content_type=export.CONTENT_TYPES[fmt])
+        response['Content-Disposition'] = f'attachment; filename="grids.{fmt}"'
+        return response
+
+
+
+# Async variants for ASGI deployments. A puzzle without a stored solution is solved on the
+# bounded solver pool (async_solver) instead of blocking the worker, and an aborted request
+# cancels its solve. Same payloads as the sync views.
+def solver_busy(): 
+    return JsonResponse({'error': 'Solver busy, retry'}, status=503)
+
+
+async def acheck_plan(pk): 
+    # check_plan with the solve of a new puzzle on the solver pool
+    plans = get_plan_cache()
+    plan = await plans.aget(pk)
+    if plan is None: 
+        grid_obj = await aget_object_or_404(Grid.objects.only('size', 'grid', 'solution', 'solved_at'), pk=pk)
+        await grid_obj.aget_solution()
+        plan = await plans.aset(pk, compile_plan(grid_obj.grid, grid_obj.solution, grid_obj.size))
+    return plan
+
+
+@require_http_methods(["POST"])
+async def validate_solution_progress_async(request, id): 
+    try: 
+        plan = await acheck_plan(id)
+    except SolverBusy: 
+        return solver_busy()
+    if not plan.solution: 
+        return JsonResponse({'error': 'Cannot solve puzzle'}, status=400)
+
+    try: 
+        data = json.loads(request.body)
+        user_input = data.get('user_input', {})
+        if not valid_entries(user_input): 
+            return JsonResponse({'error': ENTRIES_ERROR}, status=400)
+        return JsonResponse(solution_progress(plan, user_input))
+    except Exception as e: 
+        return JsonResponse({'error': str(e)}, status=400)
+
+
+async def check_solution_async(request, id): 
+    try: 
+        plan = await acheck_plan(id)
+    except SolverBusy: 
+        return solver_busy()
+
+    wrong_cells = []
+    if request.method == 'POST': 
+        wrong_cells, correct_cells = check_cells(plan, request.POST)
+
+        if request.headers.get('X-Requested-With') == 'XMLHttpRequest': 
+            return JsonResponse({
+                'wrong_cells': wrong_cells,
+                'correct_cells': correct_cells,
+                'is_complete': len(wrong_cells) == 0 and len(correct_cells) == len(plan.grid)
+            })
+
+    grid_obj = await aget_object_or_404(Grid.objects.only('id', 'size', 'grid', 'source', 'date'), pk=id)
+    # Rendering touches the board fragment cache, a sync API
+    return await sync_to_async(render)(request, 'solve.html', {
+        'id': id,
+        'puzzle': grid_obj,
+        'values': request.POST,
+        'wrong_cells': wrong_cells,
+        'description': grid_obj
+    })
+
+
+@csrf_exempt
+@require_http_methods(["POST"])
+async def solve_api_async(request, pk): 
+    # Async counterpart of SudokuSolveAPI (DRF views are sync only); takes a JSON body
+    try: 
+        data = json.loads(request.body)
+        user_input = data.get('grid_input')
+        if not isinstance(user_input, dict) or not valid_entries(user_input): 
+            return JsonResponse({'error': f'grid_input must map squares to values. {ENTRIES_ERROR}'}, status=400)
+        plan = await acheck_plan(pk)
+        result = solve_result(plan, user_input, data.get('reveal'))
+    except SolverBusy: 
+        return solver_busy()
+    except Http404: 
+        # An unknown puzzle is a 404, as in SudokuSolveAPI
+        raise
+    except Exception as e: 
+        return JsonResponse({'error': str(e)}, status=400)
+
+    headers = {}
+    user = await request.auser()
+    if request.GET.get('debug') and (settings.DEBUG or user.is_staff): 
+        stats = SolveStats()
+        try: 
+            await run_solver(solve, plan.grid, stats=stats)
+        except SolverBusy: 
+            return solver_busy()
+        result['solver_stats'] = stats.as_dict()
+        headers['X-Solver-Stats'] = json.dumps(stats.as_dict())
+    return JsonResponse(result, headers=headers)
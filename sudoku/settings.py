@@ -89,6 +89,80 @@ REST_FRAMEWORK = {
     ],
 }
 
+# Sudoku solver
+# 'bitmask' keeps candidates as 9-bit integers, 'classic' is the original string-based search,
+# 'trail' / 'trail_degree' search one board with an undo trail (MRV, or MRV with a degree tie-break),
+# 'bitset' handles every board size and 'dlx' is Dancing Links exact cover
+
+SUDOKU_SOLVER_ENGINE = config('SUDOKU_SOLVER_ENGINE', default='bitmask')
+
+# In-process LRU in front of the solver. Set CACHE_ALIAS to one of CACHES to share
+# solutions between worker processes as well; TTL is in seconds.
+SUDOKU_SOLUTION_CACHE = {
+    'MAX_ENTRIES': config('SUDOKU_SOLUTION_CACHE_MAX_ENTRIES', default=4096, cast=int),
+    'TTL': config('SUDOKU_SOLUTION_CACHE_TTL', default=3600, cast=int),
+    'CACHE_ALIAS': config('SUDOKU_SOLUTION_CACHE_ALIAS', default=''),
+}
+
+# Log wall time, search nodes, assignments, eliminations and depth of every solve
+# to the 'game.solver' logger as one JSON line each
+
+SUDOKU_SOLVER_STATS = config('SUDOKU_SOLVER_STATS', default=False, cast=bool)
+
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'game.solver': {'handlers': ['console'], 'level': 'INFO', 'propagate': False},
+    },
+}
+
+# POST /api/puzzles/solve-batch/: grids per request, solver processes (0 = one per CPU)
+# and the per-request time budget in seconds
+SUDOKU_BATCH = {
+    'MAX_GRIDS': config('SUDOKU_BATCH_MAX_GRIDS', default=100, cast=int),
+    'WORKERS': config('SUDOKU_BATCH_WORKERS', default=0, cast=int),
+    'TIME_BUDGET': config('SUDOKU_BATCH_TIME_BUDGET', default=10.0, cast=float),
+}
+
+# Async views: solver threads per process and how many solves may run or wait at once
+# before the async endpoints answer 503
+SUDOKU_ASYNC = {
+    'WORKERS': config('SUDOKU_ASYNC_WORKERS', default=4, cast=int),
+    'MAX_PENDING': config('SUDOKU_ASYNC_MAX_PENDING', default=64, cast=int),
+}
+
+# run_generator_worker: public puzzles to keep per difficulty, puzzles per queued job, and
+# seconds without progress before another worker may take over a running job
+SUDOKU_GENERATOR = {
+    'WATERMARK': config('SUDOKU_GENERATOR_WATERMARK', default=20, cast=int),
+    'JOB_SIZE': config('SUDOKU_GENERATOR_JOB_SIZE', default=10, cast=int),
+    'STALE_AFTER': config('SUDOKU_GENERATOR_STALE_AFTER', default=600, cast=int),
+    # Full grids tried when /start/ finds a difficulty empty and generates a puzzle itself
+    'INLINE_TRIES': config('SUDOKU_GENERATOR_INLINE_TRIES', default=5, cast=int),
+}
+
+# Rows per page of the my-puzzles page and the /api/puzzles/mine/ list
+SUDOKU_PAGE_SIZE = config('SUDOKU_PAGE_SIZE', default=25, cast=int)
+
+# Seconds a rendered board (puzzle givens or solution) stays in the cache; dropped on save/delete anyway
+SUDOKU_BOARD_CACHE_TTL = config('SUDOKU_BOARD_CACHE_TTL', default=3600, cast=int)
+
+# GET /api/puzzles/<pk>/ and /solution/: Cache-Control max-age sent to browsers and proxies,
+# and how long the server keeps each payload and its ETag
+SUDOKU_HTTP_MAX_AGE = config('SUDOKU_HTTP_MAX_AGE', default=3600, cast=int)
+SUDOKU_RESOURCE_CACHE_TTL = config('SUDOKU_RESOURCE_CACHE_TTL', default=86400, cast=int)
+
+# Compiled check plans (givens and solution) of stored puzzles: an in-process LRU in front
+# of the default cache, used by every check endpoint; TTL is in seconds
+SUDOKU_CHECK_PLANS = {
+    'MAX_ENTRIES': config('SUDOKU_CHECK_PLANS_MAX_ENTRIES', default=1024, cast=int),
+    'TTL': config('SUDOKU_CHECK_PLANS_TTL', default=3600, cast=int),
+}
+
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
 